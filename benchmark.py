@@ -0,0 +1,206 @@
+"""
+Benchmarks the move generation and searches of the chess module for every supported piece, across board
+sizes and densities of blockers. Boards and queries are generated from fixed random seeds, so two runs time
+the same work, and results are written as JSON to be compared against a baseline run to catch regressions.
+
+Ex: python3 benchmark.py --output baseline.json
+    python3 benchmark.py --baseline baseline.json
+
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import chess
+
+# functions of the chess module timed for every piece, board size and density
+FUNCTIONS = ('generate_possible_moves', 'find_shortest_path', 'find_min_moves')
+
+DEFAULT_SIZES = ((8, 8), (16, 16), (64, 64), (256, 256))
+DEFAULT_DENSITIES = (0.0, 0.15, 0.3, 0.45, 0.6)
+
+# number of queries on 8x8 boards, larger boards getting proportionally fewer queries down to MIN_NUM_QUERIES
+DEFAULT_NUM_QUERIES = 256
+MIN_NUM_QUERIES = 8
+
+# number of times every set of queries is timed, the fastest time being kept
+DEFAULT_REPEAT = 3
+DEFAULT_SEED = 2024
+
+# ratio of the time per call to the baseline time per call above which a benchmark is reported as a regression
+DEFAULT_THRESHOLD = 1.25
+
+
+def generate_case(num_rows, num_cols, density, num_queries, seed=DEFAULT_SEED):
+    """
+    Generates a game board with the given density of blockers and queries between its free locations,
+    from a random generator seeded by the given seed and the dimensions and density of the board.
+
+    :param num_rows: the number of rows of the game board
+    :param num_cols: the number of columns of the game board
+    :param density: the fraction of the spots of the board occupied by a chess piece, from 0 to 1
+    :param num_queries: the number of queries to generate
+    :param seed: the seed of the random generator
+    :return: a tuple of the Board and a list of (start location, end location) queries
+    """
+    rand = random.Random('{}-{}x{}-{:.2f}'.format(seed, num_rows, num_cols, density))
+    locations = [(row, col) for row in range(num_rows) for col in range(num_cols)]
+    occupied_spots = rand.sample(locations, round(density * len(locations)))
+    board = chess.Board(occupied_spots, num_rows, num_cols)
+
+    free_locations = [location for location in locations if not board.is_occupied(location)]
+    queries = [(rand.choice(free_locations), rand.choice(free_locations)) for query in range(num_queries)]
+
+    return board, queries
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, densities=DEFAULT_DENSITIES, num_queries=DEFAULT_NUM_QUERIES,
+                   repeat=DEFAULT_REPEAT, seed=DEFAULT_SEED, functions=FUNCTIONS, progress=None):
+    """
+    Times the given functions of the chess module for every supported piece on boards of every given size and density.
+
+    :param sizes: the (rows, cols) dimensions of the boards
+    :param densities: the densities of blockers on the boards, see generate_case
+    :param num_queries: the number of queries on 8x8 boards, see DEFAULT_NUM_QUERIES
+    :param repeat: the number of times the queries of every benchmark are timed, each time on a fresh copy of
+     the board, the fastest time being kept
+    :param seed: the seed of the boards and queries
+    :param functions: the names of the functions to time, see FUNCTIONS
+    :param progress: an optional file to write the result of every benchmark to as it completes
+    :return: a report dict holding the settings of the run under "settings" and a list of results under
+     "results", every result holding the "name" of the benchmark, its settings, the number of "calls"
+     timed, the fastest total time in "seconds", and "us_per_call"
+    """
+    results = []
+    for num_rows, num_cols in sizes:
+        case_num_queries = max(MIN_NUM_QUERIES, num_queries * chess.NUM_ROWS * chess.NUM_COLS // (num_rows * num_cols))
+        for density in densities:
+            board, queries = generate_case(num_rows, num_cols, density, case_num_queries, seed)
+            for function in functions:
+                for piece in sorted(chess.SUPPORTED_PIECES):
+                    # every timing runs on a fresh copy of the board, never queried itself, so that none
+                    # starts with the connected components labelled by an earlier one
+                    seconds = min(__time_calls(function, board.copy(), queries, piece) for attempt in range(repeat))
+                    result = {
+                        'name': '{}/{}/{}x{}/{:.2f}'.format(function, piece, num_rows, num_cols, density),
+                        'function': function,
+                        'piece': piece,
+                        'rows': num_rows,
+                        'cols': num_cols,
+                        'density': density,
+                        'calls': len(queries),
+                        'seconds': seconds,
+                        'us_per_call': seconds * 1e6 / len(queries),
+                    }
+                    results.append(result)
+                    if progress is not None:
+                        progress.write('{:<48} {:>12.2f} us/call\n'.format(result['name'], result['us_per_call']))
+                        progress.flush()
+
+    settings = {
+        'sizes': [list(size) for size in sizes],
+        'densities': list(densities),
+        'num_queries': num_queries,
+        'repeat': repeat,
+        'seed': seed,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+    }
+    return {'settings': settings, 'results': results}
+
+
+def compare_reports(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares the results of a report with the results of the same benchmarks in a baseline report.
+
+    :param report: the report of the current run, as returned by run_benchmarks
+    :param baseline: the report of the baseline run
+    :param threshold: the ratio of the time per call to the baseline time per call above which a benchmark regressed
+    :return: a list holding, for every benchmark run in both reports, a dict with its "name", "baseline_us" and
+     "current_us" times per call, their "ratio", and whether it's a "regression"
+    """
+    baseline_results = {result['name']: result for result in baseline['results']}
+    comparisons = []
+    for result in report['results']:
+        baseline_result = baseline_results.get(result['name'])
+        if baseline_result is None:
+            continue
+        ratio = result['us_per_call'] / baseline_result['us_per_call'] if baseline_result['us_per_call'] else 1.0
+        comparisons.append({
+            'name': result['name'],
+            'baseline_us': baseline_result['us_per_call'],
+            'current_us': result['us_per_call'],
+            'ratio': ratio,
+            'regression': ratio > threshold,
+        })
+    return comparisons
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the chess module and compare against a baseline.')
+    parser.add_argument('--sizes', default=','.join('{}x{}'.format(*size) for size in DEFAULT_SIZES),
+                        help='comma separated board dimensions, e.g. 8x8,64x64')
+    parser.add_argument('--densities', default=','.join(str(density) for density in DEFAULT_DENSITIES),
+                        help='comma separated densities of blockers, from 0 to 1')
+    parser.add_argument('--functions', default=','.join(FUNCTIONS), help='comma separated functions to time')
+    parser.add_argument('--queries', type=int, default=DEFAULT_NUM_QUERIES, help='number of queries on 8x8 boards')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='number of timings kept the fastest of')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='seed of the boards and queries')
+    parser.add_argument('--output', help='file to write the JSON report to, stdout if omitted')
+    parser.add_argument('--baseline', help='JSON report to compare against, exiting with 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='slowdown ratio above which a benchmark is a regression')
+    args = parser.parse_args(argv)
+
+    sizes = [tuple(int(dimension) for dimension in size.split('x')) for size in args.sizes.split(',')]
+    densities = [float(density) for density in args.densities.split(',')]
+    functions = args.functions.split(',')
+    for function in functions:
+        if function not in FUNCTIONS:
+            parser.error('unsupported function: {!r}'.format(function))
+
+    report = run_benchmarks(sizes, densities, args.queries, args.repeat, args.seed, functions, progress=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+    elif not args.baseline:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            comparisons = compare_reports(report, json.load(baseline_file), args.threshold)
+        print('{:<48} {:>12} {:>12} {:>8}'.format('benchmark', 'baseline us', 'current us', 'ratio'))
+        for comparison in comparisons:
+            print('{:<48} {:>12.2f} {:>12.2f} {:>7.2f}x{}'.format(
+                comparison['name'], comparison['baseline_us'], comparison['current_us'], comparison['ratio'],
+                '  REGRESSION' if comparison['regression'] else ''))
+        if any(comparison['regression'] for comparison in comparisons):
+            return 1
+
+    return 0
+
+
+def __time_calls(function, board, queries, piece):
+    """
+    Returns the number of seconds taken to call the given function of the chess module on every query.
+    """
+    if function == 'generate_possible_moves':
+        start_time = time.perf_counter()
+        for start_loc, end_loc in queries:
+            chess.generate_possible_moves(board, start_loc, piece)
+        return time.perf_counter() - start_time
+
+    find = getattr(chess, function)
+    start_time = time.perf_counter()
+    for start_loc, end_loc in queries:
+        find(board, start_loc, end_loc, piece)
+    return time.perf_counter() - start_time
+
+
+if __name__ == "__main__":
+    sys.exit(main())
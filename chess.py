@@ -1,7 +1,21 @@
-from queue import Queue
-
-NUM_ROWS = 8  # rows
-NUM_COLS = 8  # cols
+import heapq
+import itertools
+import mmap
+import os
+import random
+import re
+import struct
+import time
+from array import array
+from collections import OrderedDict, namedtuple
+
+try:
+    import numpy
+except ImportError:  # numpy is only required by distance_fields
+    numpy = None
+
+NUM_ROWS = 8  # default rows
+NUM_COLS = 8  # default cols
 EMPTY_CHAR = 'O'
 OCCUPIED_CHAR = 'X'
 
@@ -12,21 +26,740 @@ KNIGHT = 'knight'
 
 SUPPORTED_PIECES = {BISHOP, KING, ROOK, KNIGHT}
 
+BFS = 'bfs'
+BIDIRECTIONAL = 'bidirectional'
+ASTAR = 'astar'
+
+SUPPORTED_SEARCHES = {BFS, BIDIRECTIONAL, ASTAR}
+
+# search recorded in SearchStats by find_min_moves when it expands whole BFS levels at once as bitboards,
+# counting every location of every level up to the one reaching the end location as expanded
+LEVEL_BFS = 'level_bfs'
+
+# distance returned by distance_fields for locations that can't be reached
+UNREACHABLE = -1
+
+# boards with up to this many squares get per-square move tables, moves on larger boards
+# being computed as they're generated to keep memory use linear in the number of squares
+TABLE_MAX_SQUARES = 4096
+
+# bitboard with a bit set for every location on a game board of the default dimensions
+FULL_MASK = (1 << (NUM_ROWS * NUM_COLS)) - 1
+
+# random 64-bit key of every square, the Zobrist hash of a board being the XOR of the keys of its occupied
+# squares so it's updated with a single XOR whenever a spot changes. Keys are drawn from fixed seeds,
+# ZOBRIST_BLOCK_SIZE keys at a time, as boards with more squares are hashed.
+ZOBRIST_KEYS = []
+ZOBRIST_BLOCK_SIZE = 4096
+
+# second, independent key of every square, drawn from seeds starting at ZOBRIST_CHECK_SEED, whose hash is
+# compared to rule out collisions of the Zobrist hash in 64 bits rather than against the whole board
+ZOBRIST_CHECK_KEYS = []
+ZOBRIST_CHECK_SEED = 1 << 32
+
+DEFAULT_CACHE_SIZE = 4096
+
+
+class Board:
+    """
+    A chess game board of any dimensions, storing its spots in a flat bytearray indexed by the square index
+    (row * num_cols + col) of every location, a byte of 1 marking a spot occupied by a chess piece.
+
+    A Board can be passed anywhere a 2D list of characters is accepted. Occupancy checks against a Board are
+    single byte lookups instead of character comparisons, and the occupied and empty spots of the whole
+    board are also available at once as bitboards: integers in which the bit of the square index of a
+    location is set when that location is occupied, or empty, respectively.
+    """
+
+    # translations between the bytes of the spots and the characters of a bitboard written in binary
+    __CELLS_TO_BITS = bytes.maketrans(b'\x00\x01', b'01')
+    __BITS_TO_CELLS = bytes.maketrans(b'01', b'\x00\x01')
+
+    # bytes of the 8 spots of every byte of a packed bitboard, lowest bit first
+    __BYTE_TO_CELLS = [bytes((byte >> bit) & 1 for bit in range(8)) for byte in range(256)]
+
+    # runs of empty spots of a board string, and translations between the characters and the bytes of the spots
+    # (2 for invalid characters)
+    __EMPTY_RUN = re.compile(r'\d+')
+    __EMPTY_CHARS = re.compile(EMPTY_CHAR + '+')
+    __CHARS_TO_CELLS = bytes(1 if char in (OCCUPIED_CHAR, OCCUPIED_CHAR.lower()) else 0 if char == EMPTY_CHAR else 2
+                             for char in map(chr, range(256)))
+    __CELLS_TO_CHARS = bytes.maketrans(b'\x00\x01', (EMPTY_CHAR + OCCUPIED_CHAR).encode())
+
+    # rows of up to ROW_CACHE_MAX_SPOTS spots of board strings parsed or written so far, mapping their strings to
+    # the bytes of their spots and back, as rows of small boards repeat across boards. Both are emptied once they
+    # hold ROW_CACHE_SIZE rows.
+    ROW_CACHE_SIZE = 1 << 16
+    ROW_CACHE_MAX_SPOTS = 64
+    __row_cells = dict()
+    __row_strings = dict()
+
+    def __init__(self, occupied_spots=(), num_rows=NUM_ROWS, num_cols=NUM_COLS):
+        """
+        :param occupied_spots: a set of locations to be marked as occupied by chess pieces on the game board,
+         locations out of the bounds of the board are ignored
+        :param num_rows: the number of rows of the game board
+        :param num_cols: the number of columns of the game board
+        """
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.cells = bytearray(num_rows * num_cols)
+        # bitboards of the occupied and empty spots and Zobrist hash, computed when first needed
+        self.__occupied = None
+        self.__empty = None
+        self.__zobrist = None
+        self.__zobrist_check = None
+        # labels of the connected components of the empty spots for every piece (see connected_components),
+        # computed when first needed and dropped as spots are occupied or freed
+        self.components = dict()
+        for spot in occupied_spots:
+            self.occupy(spot)
+
+    @classmethod
+    def from_bitboard(cls, occupied, num_rows=NUM_ROWS, num_cols=NUM_COLS):
+        """
+        Creates a board from a bitboard of occupied spots. Bits beyond the size of the board are ignored.
+        """
+        board = cls(num_rows=num_rows, num_cols=num_cols)
+        num_squares = num_rows * num_cols
+        if num_squares:
+            # the binary digits of the bitboard, lowest square first, are the bytes of the spots
+            bits = format(occupied & ((1 << num_squares) - 1), 'b').zfill(num_squares)
+            board.cells[:] = bits[::-1].encode().translate(Board.__BITS_TO_CELLS)
+        return board
+
+    @classmethod
+    def from_grid(cls, grid):
+        """
+        Creates a board from a 2D list of characters as returned by generate_board, where every
+        character other than OCCUPIED_CHAR is considered an empty spot.
+        """
+        board = cls(num_rows=len(grid), num_cols=len(grid[0]) if grid else 0)
+        board.cells[:] = bytes(char == OCCUPIED_CHAR for row in grid for char in row)
+        return board
+
+    @classmethod
+    def from_fen(cls, fen):
+        """
+        Creates a board from a board string as returned by to_fen, in the manner of the piece placement field of
+        FEN: the rows of the board from row 0 separated by '/', every row holding OCCUPIED_CHAR (or its lowercase)
+        for an occupied spot and the number of consecutive empty spots for a run of them, e.g. "8/8/2XX4/8/8/8/8/8".
+        The dimensions of the board are those of the string. Raises ValueError for an invalid board string.
+        """
+        row_cells = Board.__row_cells
+        rows = [row_cells.get(row) or Board.__parse_row(row) for row in fen.strip().split('/')]
+        num_cols = len(rows[0])
+        if not num_cols:
+            raise ValueError('board string without spots: {!r}'.format(fen))
+        if any(len(row) != num_cols for row in rows):
+            raise ValueError('rows of different lengths in board string: {!r}'.format(fen))
+
+        board = cls(num_rows=len(rows), num_cols=num_cols)
+        board.cells[:] = b''.join(rows)
+        return board
+
+    @classmethod
+    def from_bytes(cls, data, num_rows=NUM_ROWS, num_cols=NUM_COLS):
+        """
+        Creates a board from its bitboard of occupied spots packed in little-endian bytes, as returned by to_bytes.
+        Bits beyond the size of the board are ignored.
+        """
+        board = cls(num_rows=num_rows, num_cols=num_cols)
+        num_squares = num_rows * num_cols
+        # every byte holds the spots of 8 consecutive squares, lowest square first
+        cells = b''.join(map(Board.__BYTE_TO_CELLS.__getitem__, data[:(num_squares + 7) // 8]))
+        board.cells[:] = cells[:num_squares].ljust(num_squares, b'\x00')
+        return board
+
+    @staticmethod
+    def __parse_row(row):
+        """
+        Returns the bytes of the spots of a row of a board string, see from_fen.
+        """
+        # expand the runs of empty spots, so that the row holds a character per spot
+        chars = Board.__EMPTY_RUN.sub(lambda run: EMPTY_CHAR * int(run.group()), row)
+        cells = chars.encode('latin-1', 'replace').translate(Board.__CHARS_TO_CELLS)
+        if 2 in cells:
+            raise ValueError('invalid character in board string row: {!r}'.format(row))
+        if len(cells) <= Board.ROW_CACHE_MAX_SPOTS:
+            if len(Board.__row_cells) >= Board.ROW_CACHE_SIZE:
+                Board.__row_cells.clear()
+            Board.__row_cells[row] = cells
+        return cells
+
+    @staticmethod
+    def __write_row(cells):
+        """
+        Returns the row of a board string holding the given bytes of spots, see to_fen.
+        """
+        chars = cells.translate(Board.__CELLS_TO_CHARS).decode()
+        row = Board.__EMPTY_CHARS.sub(lambda run: str(len(run.group())), chars)
+        if len(cells) <= Board.ROW_CACHE_MAX_SPOTS:
+            if len(Board.__row_strings) >= Board.ROW_CACHE_SIZE:
+                Board.__row_strings.clear()
+            Board.__row_strings[cells] = row
+        return row
+
+    @staticmethod
+    def __zobrist_keys(num_squares, keys=ZOBRIST_KEYS, seed=0):
+        """
+        Returns the given Zobrist keys (ZOBRIST_KEYS by default), drawing more keys from the seeds following
+        the given one if there are less than the given number of squares.
+        """
+        while len(keys) < num_squares:
+            block = random.Random(seed + len(keys) // ZOBRIST_BLOCK_SIZE).getrandbits(64 * ZOBRIST_BLOCK_SIZE)
+            keys.extend(array('Q', block.to_bytes(8 * ZOBRIST_BLOCK_SIZE, 'little')))
+        return keys
+
+    def __hash_spots(self, keys):
+        """
+        Returns the XOR of the given keys of the occupied squares.
+        """
+        zobrist = 0
+        square = self.cells.find(1)
+        while square >= 0:
+            zobrist ^= keys[square]
+            square = self.cells.find(1, square + 1)
+        return zobrist
+
+    @property
+    def occupied(self):
+        """
+        Bitboard with a bit set for every location of the game board that is occupied.
+        """
+        if self.__occupied is None:
+            self.__occupied = int(self.cells.translate(Board.__CELLS_TO_BITS)[::-1], 2) if self.cells else 0
+        return self.__occupied
+
+    @property
+    def empty(self):
+        """
+        Bitboard with a bit set for every location of the game board that is not occupied.
+        """
+        if self.__empty is None:
+            self.__empty = ((1 << len(self.cells)) - 1) ^ self.occupied
+        return self.__empty
+
+    @property
+    def zobrist(self):
+        """
+        Zobrist hash of the occupied spots, computed once then updated as spots are occupied or freed.
+        """
+        if self.__zobrist is None:
+            self.__zobrist = self.__hash_spots(Board.__zobrist_keys(len(self.cells)))
+        return self.__zobrist
+
+    @property
+    def zobrist_check(self):
+        """
+        Second Zobrist hash of the occupied spots, of keys independent of the ones of zobrist, computed once
+        then updated as spots are occupied or freed.
+        """
+        if self.__zobrist_check is None:
+            self.__zobrist_check = self.__hash_spots(
+                Board.__zobrist_keys(len(self.cells), ZOBRIST_CHECK_KEYS, ZOBRIST_CHECK_SEED))
+        return self.__zobrist_check
+
+    def is_within(self, cur_loc):
+        """
+        Determines if the given location falls within the bounds of the game board, see is_within_board.
+        """
+        return 0 <= cur_loc[0] < self.num_rows and 0 <= cur_loc[1] < self.num_cols
+
+    def is_occupied(self, cur_loc):
+        """
+        Determine if the given location is occupied by a chess piece, see is_occupied_spot.
+        """
+        if not self.is_within(cur_loc):
+            return None
+        return self.cells[cur_loc[0] * self.num_cols + cur_loc[1]] == 1
+
+    def occupy(self, cur_loc):
+        """
+        Marks the given location as occupied. Locations out of the bounds of the board are ignored.
+        """
+        if self.is_occupied(cur_loc) is False:
+            self.__set_cell(cur_loc[0] * self.num_cols + cur_loc[1], 1)
+
+    def free(self, cur_loc):
+        """
+        Marks the given location as empty. Locations out of the bounds of the board are ignored.
+        """
+        if self.is_occupied(cur_loc):
+            self.__set_cell(cur_loc[0] * self.num_cols + cur_loc[1], 0)
+
+    def __set_cell(self, square, value):
+        self.cells[square] = value
+        self.__occupied = None
+        self.__empty = None
+        if self.__zobrist is not None:
+            self.__zobrist ^= Board.__zobrist_keys(square + 1)[square]
+        if self.__zobrist_check is not None:
+            self.__zobrist_check ^= Board.__zobrist_keys(square + 1, ZOBRIST_CHECK_KEYS, ZOBRIST_CHECK_SEED)[square]
+        if self.components:
+            self.components = dict()
+
+    def to_grid(self):
+        """
+        Returns the board as a 2D list of characters in the format returned by generate_board.
+        """
+        return [[OCCUPIED_CHAR if cell else EMPTY_CHAR
+                 for cell in self.cells[row * self.num_cols:(row + 1) * self.num_cols]]
+                for row in range(self.num_rows)]
+
+    def to_fen(self):
+        """
+        Returns the board as a board string, see from_fen.
+        """
+        if not self.cells:
+            return ''
+        cells = bytes(self.cells)
+        row_strings = Board.__row_strings
+        return '/'.join([row_strings.get(row) or Board.__write_row(row)
+                         for row in (cells[start:start + self.num_cols] for start in range(0, len(cells), self.num_cols))])
+
+    def to_bytes(self):
+        """
+        Returns the bitboard of occupied spots packed in little-endian bytes, a byte per 8 squares, see from_bytes.
+        """
+        return self.occupied.to_bytes((len(self.cells) + 7) // 8, 'little')
+
+    def copy(self):
+        board = Board(num_rows=self.num_rows, num_cols=self.num_cols)
+        board.cells[:] = self.cells
+        board.__occupied = self.__occupied
+        board.__empty = self.__empty
+        board.__zobrist = self.__zobrist
+        board.__zobrist_check = self.__zobrist_check
+        board.components = dict(self.components)
+        return board
+
+    def __eq__(self, other):
+        return isinstance(other, Board) and self.num_rows == other.num_rows and \
+            self.num_cols == other.num_cols and self.cells == other.cells
+
+    # boards change as spots are occupied or freed, so they aren't hashable; the Zobrist hash of their current
+    # spots is available as zobrist
+    __hash__ = None
+
+    def __repr__(self):
+        return 'Board.from_bitboard({:#x}, {}, {})'.format(self.occupied, self.num_rows, self.num_cols)
+
+
+class SearchStats:
+    """
+    Statistics of a search, filled in by find_shortest_path and find_min_moves when given one, or of move
+    generation, filled in by generate_possible_moves and keep_valid_moves. Counts and times add up over the
+    calls given the same SearchStats, so one can gather the statistics of a whole set of queries.
+    """
+
+    def __init__(self):
+        # search that was run (one of SUPPORTED_SEARCHES, or LEVEL_BFS), or None if the query was answered without searching
+        self.search = None
+        # number of board locations whose moves were generated during search
+        self.nodes_expanded = 0
+        # number of valid moves generated, and of moves the piece would have on an empty board of the same
+        # dimensions that occupied spots block (or that keep_valid_moves rejects)
+        self.moves_generated = 0
+        self.moves_rejected = 0
+        # largest number of locations waiting to be expanded at once
+        self.frontier_peak = 0
+        # wall time spent generating moves, and spent in the rest of the search
+        self.movegen_seconds = 0.0
+        self.bookkeeping_seconds = 0.0
+
+    def __repr__(self):
+        return 'SearchStats(search={!r}, nodes_expanded={}, moves_generated={}, moves_rejected={}, ' \
+               'frontier_peak={}, movegen_seconds={:.6f}, bookkeeping_seconds={:.6f})'.format(
+                   self.search, self.nodes_expanded, self.moves_generated, self.moves_rejected,
+                   self.frontier_peak, self.movegen_seconds, self.bookkeeping_seconds)
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'max_size', 'size'])
+
+
+class PathCache:
+    """
+    Bounded cache of the shortest paths found on game boards, keyed by the dimensions and Zobrist hash of
+    the board along with the start and end locations and the chess piece. When full, the least recently used path is evicted.
 
-def generate_board(occupied_spots):
+    Paths are stored as tuples and returned as new lists, so callers are free to modify the returned paths.
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        """
+        :param max_size: the maximum number of paths kept in the cache, at least 0
+        """
+        if max_size < 0:
+            raise ValueError('negative cache size: {!r}'.format(max_size))
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # mapping from (rows, cols, zobrist hash, start, end, piece) to the second Zobrist hash of the board
+        # (see Board.zobrist_check), used to rule out hash collisions, and the path (or None if there's no path)
+        self.__entries = OrderedDict()
+
+    def lookup(self, board, start_loc, end_loc, piece):
+        """
+        Looks up the shortest path between the given locations for the given piece on the given Board.
+
+        :return: a tuple of True and the cached path (None if no path exists) on a cache hit,
+         or a tuple of False and None on a cache miss
+        """
+        key = (board.num_rows, board.num_cols, board.zobrist, start_loc, end_loc, piece)
+        entry = self.__entries.get(key)
+        if entry is None or entry[0] != board.zobrist_check:
+            self.misses += 1
+            return False, None
+
+        self.__entries.move_to_end(key)
+        self.hits += 1
+        return True, None if entry[1] is None else list(entry[1])
+
+    def store(self, board, start_loc, end_loc, piece, path):
+        """
+        Stores the shortest path (None if no path exists) between the given locations for the given piece
+        on the given Board, evicting the least recently used path if the cache is full.
+        """
+        key = (board.num_rows, board.num_cols, board.zobrist, start_loc, end_loc, piece)
+        self.__entries[key] = (board.zobrist_check, None if path is None else tuple(path))
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.max_size:
+            self.__entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Removes all paths from the cache and resets its statistics.
+        """
+        self.__entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def info(self):
+        """
+        Returns the hit/miss statistics and the current size of the cache as a CacheInfo.
+        """
+        return CacheInfo(self.hits, self.misses, self.evictions, self.max_size, len(self.__entries))
+
+    def __len__(self):
+        return len(self.__entries)
+
+
+# cache consulted by find_shortest_path and find_min_moves, None while caching is disabled
+__path_cache = None
+
+
+def enable_cache(max_size=DEFAULT_CACHE_SIZE):
+    """
+    Enables caching of the shortest paths found by find_shortest_path and find_min_moves, replacing any
+    previously enabled cache.
+
+    :param max_size: the maximum number of paths kept in the cache
+    :return: the PathCache now in use, whose info method returns the hit/miss statistics
+    """
+    global __path_cache
+    __path_cache = PathCache(max_size)
+    return __path_cache
+
+
+def disable_cache():
+    """
+    Disables caching of shortest paths, dropping all cached paths.
+    """
+    global __path_cache
+    __path_cache = None
+
+
+def get_cache():
+    """
+    Returns the PathCache currently in use, or None if caching is disabled.
+    """
+    return __path_cache
+
+
+class DistanceField:
+    """
+    Distance field of a chess piece from a start location on a game board, kept up to date as single spots of
+    the board are occupied or freed. Only the locations whose distance may change are visited: when a spot is
+    freed, distances decrease outward from the new moves it opens up, and when a spot is occupied, the locations
+    left without a move from a location one move closer to the start location get their distance recomputed.
+
+    The field holds its own copy of the board, in which the start location is kept free for the piece.
+    """
+
+    def __init__(self, board, start_loc, piece):
+        """
+        :param board: a Board or a 2D list of characters representing the game board
+        :param start_loc: an integer tuple representing the starting location of the given chess piece
+        :param piece: the chess piece for which the minimum numbers of moves are to be found
+        """
+        self.board = board.copy() if isinstance(board, Board) else Board.from_grid(board)
+        if not self.board.is_within(start_loc):
+            raise ValueError('start location out of bounds: {!r}'.format(start_loc))
+        if piece.lower() not in SUPPORTED_PIECES:
+            raise ValueError('unsupported piece: {!r}'.format(piece))
+
+        self.start_loc = tuple(start_loc)
+        self.piece = piece.lower()
+        self.board.free(self.start_loc)
+        self.__gen_moves = move_generator(self.board, self.piece)
+        # sliding pieces have moves passing over a spot, which are cut or opened up along with it
+        self.__spec = PIECE_SPECS[self.piece]
+
+        # minimum number of moves to every square, or UNREACHABLE, found by a BFS from the start location
+        start = self.start_loc[0] * self.board.num_cols + self.start_loc[1]
+        self.__distances = array('i', [UNREACHABLE]) * len(self.board.cells)
+        self.__distances[start] = 0
+        frontier = [start]
+        level = 0
+        while frontier:
+            level += 1
+            next_frontier = []
+            for cur_square in frontier:
+                for square in self.__gen_moves(self.board.cells, cur_square):
+                    if self.__distances[square] == UNREACHABLE:
+                        self.__distances[square] = level
+                        next_frontier.append(square)
+            frontier = next_frontier
+
+    def distance(self, cur_loc):
+        """
+        Returns the minimum number of moves from the start location to the given location, or None if it
+        can't be reached or doesn't lie within the bounds of the board.
+        """
+        if not self.board.is_within(cur_loc):
+            return None
+        distance = self.__distances[cur_loc[0] * self.board.num_cols + cur_loc[1]]
+        return None if distance == UNREACHABLE else distance
+
+    def distances(self):
+        """
+        Returns a 2D list holding the minimum number of moves to every location of the game board,
+        or None for the locations that can't be reached, as returned by distance_field.
+        """
+        num_cols = self.board.num_cols
+        return [[None if distance == UNREACHABLE else distance
+                 for distance in self.__distances[row * num_cols:(row + 1) * num_cols]]
+                for row in range(self.board.num_rows)]
+
+    def path(self, end_loc):
+        """
+        Returns a shortest path from the start location to the given location, following back moves to
+        locations one move closer to the start location, or None if the location can't be reached.
+        """
+        if self.distance(end_loc) is None:
+            return None
+
+        num_cols = self.board.num_cols
+        cur_square = end_loc[0] * num_cols + end_loc[1]
+        path = [tuple(end_loc)]
+        # every piece moves the same way forward and backward between free locations
+        while self.__distances[cur_square]:
+            closer = self.__distances[cur_square] - 1
+            cur_square = next(square for square in self.__gen_moves(self.board.cells, cur_square)
+                              if self.__distances[square] == closer)
+            path.append(divmod(cur_square, num_cols))
+        path.reverse()
+
+        return path
+
+    def occupy(self, cur_loc, stats=None):
+        """
+        Marks the given location as occupied and updates the distances it changes. Locations out of the bounds
+        of the board, already occupied, and the start location are ignored.
+
+        :param cur_loc: an integer tuple representing the location to occupy
+        :param stats: an optional SearchStats to fill in with the number of nodes expanded by the update
+        """
+        if self.board.is_occupied(cur_loc) is not False or tuple(cur_loc) == self.start_loc:
+            return
+
+        distances = self.__distances
+        square = cur_loc[0] * self.board.num_cols + cur_loc[1]
+        distance = distances[square]
+        self.board.occupy(cur_loc)
+        distances[square] = UNREACHABLE
+        if distance == UNREACHABLE:
+            # none of the moves cut by the spot were reachable either
+            return
+
+        # locations whose move from a location one move closer to the start location may have been cut:
+        # the ones reached from the spot, and for sliders, the ones reached over it from the opposite side
+        neighbours = self.__gen_moves(self.board.cells, square)
+        candidates = [(distance + 1, neighbour) for neighbour in neighbours if distances[neighbour] == distance + 1]
+        for neighbour, closest in self.__closest_over(square):
+            if closest is not None and distances[neighbour] == closest + 1:
+                candidates.append((closest + 1, neighbour))
+
+        nodes_expanded = self.__increase(candidates)
+        if stats is not None:
+            stats.nodes_expanded += nodes_expanded
+
+    def free(self, cur_loc, stats=None):
+        """
+        Marks the given location as empty and updates the distances it changes. Locations out of the bounds
+        of the board and already empty are ignored.
+
+        :param cur_loc: an integer tuple representing the location to free
+        :param stats: an optional SearchStats to fill in with the number of nodes expanded by the update
+        """
+        if not self.board.is_occupied(cur_loc):
+            return
+
+        square = cur_loc[0] * self.board.num_cols + cur_loc[1]
+        self.board.free(cur_loc)
+
+        # locations which may get closer to the start location through the new moves: the spot itself,
+        # and for sliders, the ones reached over it from the opposite side
+        neighbours = self.__gen_moves(self.board.cells, square)
+        seeds = []
+        closest = self.__closest(neighbours)
+        if closest is not None:
+            seeds.append((closest + 1, square))
+        for neighbour, closest in self.__closest_over(square):
+            if closest is not None:
+                seeds.append((closest + 1, neighbour))
+
+        nodes_expanded = self.__decrease(seeds)
+        if stats is not None:
+            stats.nodes_expanded += nodes_expanded
+
+    def __closest(self, squares):
+        """
+        Returns the minimum number of moves to any of the given squares, or None if none can be reached.
+        """
+        reached = [self.__distances[square] for square in squares if self.__distances[square] != UNREACHABLE]
+        return min(reached) if reached else None
+
+    def __closest_over(self, square):
+        """
+        Returns a (square, distance) tuple for every square a slider rides to from the given square, holding
+        the minimum number of moves to the squares reached over the given square from the opposite side,
+        or None if none can be reached.
+        """
+        num_rows, num_cols = self.board.num_rows, self.board.num_cols
+        cells = self.board.cells
+        max_range = self.__spec.max_range
+        row, col = divmod(square, num_cols)
+
+        # squares ridden to from the given square in every direction, until a blocker or the maximum range
+        rays = dict()
+        for add_to_row, add_to_col in self.__spec.rides:
+            ray = []
+            ray_row, ray_col = row + add_to_row, col + add_to_col
+            while 0 <= ray_row < num_rows and 0 <= ray_col < num_cols and not cells[ray_row * num_cols + ray_col] \
+                    and (max_range is None or len(ray) < max_range):
+                ray.append(ray_row * num_cols + ray_col)
+                ray_row, ray_col = ray_row + add_to_row, ray_col + add_to_col
+            rays[(add_to_row, add_to_col)] = ray
+
+        closest_over = []
+        for (add_to_row, add_to_col), ray in rays.items():
+            opposite_ray = rays[(-add_to_row, -add_to_col)]
+            if max_range is None:
+                closest = self.__closest(ray)
+                closest_over.extend((neighbour, closest) for neighbour in opposite_ray)
+            else:
+                # a ride over the square covers at most max_range steps on both sides together
+                closest_over.extend((neighbour, self.__closest(ray[:max_range - steps]))
+                                    for steps, neighbour in enumerate(opposite_ray, 1))
+        return closest_over
+
+    def __decrease(self, seeds):
+        """
+        Lowers the distances of the given (distance, square) seeds and of the squares reached from them
+        when shorter than their current distances. Returns the number of nodes expanded.
+        """
+        distances = self.__distances
+        fringe = [(distance, square) for distance, square in seeds
+                  if distances[square] == UNREACHABLE or distance < distances[square]]
+        heapq.heapify(fringe)
+        nodes_expanded = 0
+
+        while fringe:
+            distance, cur_square = heapq.heappop(fringe)
+            if distances[cur_square] != UNREACHABLE and distances[cur_square] <= distance:
+                continue
+            distances[cur_square] = distance
+            nodes_expanded += 1
+            for square in self.__gen_moves(self.board.cells, cur_square):
+                if distances[square] == UNREACHABLE or distances[square] > distance + 1:
+                    heapq.heappush(fringe, (distance + 1, square))
+
+        return nodes_expanded
+
+    def __increase(self, candidates):
+        """
+        Recomputes the distances of the squares left without a move from a square one move closer to the start
+        location, checking the given (distance, square) candidates and, for every square left without one, the
+        squares it was one move closer to the start location than. Returns the number of nodes expanded.
+        """
+        distances = self.__distances
+        gen_moves = self.__gen_moves
+        cells = self.board.cells
+        heapq.heapify(candidates)
+        checked = set()
+        affected = set()
+        nodes_expanded = 0
+
+        # candidates are checked in order of distance, so the squares one move closer are all settled
+        while candidates:
+            distance, cur_square = heapq.heappop(candidates)
+            if cur_square in checked:
+                continue
+            checked.add(cur_square)
+            nodes_expanded += 1
+            moves = gen_moves(cells, cur_square)
+            if any(distances[square] == distance - 1 and square not in affected for square in moves):
+                continue
+            affected.add(cur_square)
+            for square in moves:
+                if distances[square] == distance + 1:
+                    heapq.heappush(candidates, (distance + 1, square))
+
+        # affected squares get their distance back from the unaffected squares around them,
+        # then from one another in order of distance
+        for square in affected:
+            distances[square] = UNREACHABLE
+        fringe = []
+        for cur_square in affected:
+            closest = self.__closest(gen_moves(cells, cur_square))
+            if closest is not None:
+                fringe.append((closest + 1, cur_square))
+        heapq.heapify(fringe)
+
+        while fringe:
+            distance, cur_square = heapq.heappop(fringe)
+            if distances[cur_square] != UNREACHABLE:
+                continue
+            distances[cur_square] = distance
+            nodes_expanded += 1
+            for square in gen_moves(cells, cur_square):
+                if square in affected and distances[square] == UNREACHABLE:
+                    heapq.heappush(fringe, (distance + 1, square))
+
+        return nodes_expanded
+
+
+def generate_board(occupied_spots, num_rows=NUM_ROWS, num_cols=NUM_COLS):
     """
     Generates a chess game board containing characters marking the empty and occupied spots.
 
     Should any input occupied spots be located out of the bounds of the board, they will be ignored.
 
     :param occupied_spots: a set of locations to be marked as occupied by chess pieces on the game board
-    :return a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
+    :param num_rows: the number of rows of the game board
+    :param num_cols: the number of columns of the game board
+    :return a 2D list of characters representing the game board, with dimensions num_rows and num_cols, character EMPTY_CHAR
      for a spot containing no chess piece, and character OCCUPIED_CHAR for a spot containing a
      chess piece
     """
-    board = [[EMPTY_CHAR for row in range(NUM_ROWS)] for col in range(NUM_COLS)]
+    board = [[EMPTY_CHAR for col in range(num_cols)] for row in range(num_rows)]
     for spot in occupied_spots:
-        if is_within_board(spot):
+        if is_within_board(spot, board):
             board[spot[0]][spot[1]] = OCCUPIED_CHAR
     return board
 
@@ -35,307 +768,1985 @@ def print_board(board):
     """
     Prints a simple character representation of the board to stdout.
 
-    :param board: a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
+    :param board: a Board or a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
      for a spot containing no chess piece, and character OCCUPIED_CHAR for a spot containing a
      chess piece
     """
+    if isinstance(board, Board):
+        board = board.to_grid()
     for row in board:
         print(row)
 
 
-def is_within_board(cur_loc):
+def is_within_board(cur_loc, board=None):
     """
     Determines if the given location falls withing the bounds of the game board.
 
     :param cur_loc: an integer tuple representing the location to check for falling within board bounds
+    :param board: a Board or a 2D list of characters representing the game board, or None for a game board
+     of the default dimensions NUM_ROWS and NUM_COLS
     :return: True if the given location lies within the bounds of the game board, False if it lies outside
     """
+    if isinstance(board, Board):
+        return board.is_within(cur_loc)
+    if board is None:
+        num_rows, num_cols = NUM_ROWS, NUM_COLS
+    else:
+        num_rows, num_cols = len(board), len(board[0]) if board else 0
     row = cur_loc[0]
     col = cur_loc[1]
-    return row >= 0 and row < NUM_ROWS and col >= 0 and col < NUM_COLS
+    return row >= 0 and row < num_rows and col >= 0 and col < num_cols
 
 
 def is_occupied_spot(board, cur_loc):
     """
     Determine if the given location is occupied by a chess piece on the game board.
 
-    :param board: a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
+    :param board: a Board or a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
      for a spot containing no chess piece, and character OCCUPIED_CHAR for a spot containing a
      chess piece
     :param cur_loc: an integer tuple representing the location being considered
     :return: True if the given location is occupied by a chess piece, False if it's open,
      or None if the given location doesn't lie within the bounds of the game board
     """
-    if not is_within_board(cur_loc):
+    if isinstance(board, Board):
+        return board.is_occupied(cur_loc)
+    if not is_within_board(cur_loc, board):
         return None
     return board[cur_loc[0]][cur_loc[1]] == OCCUPIED_CHAR
 
 
-def generate_possible_moves(board, cur_loc, piece):
+# declarative definition of the moves of a piece: the offsets (to row, to col) it leaps by straight to its target
+# location, jumping over any other chess piece in between, the directions (to row, to col) it rides along, step
+# after step until the edge of the board or another chess piece is reached, and the maximum number of steps of
+# a ride, None for no limit. A piece moves the same way forward and backward, so every offset and direction comes
+# along with its opposite.
+PieceSpec = namedtuple('PieceSpec', ['leaps', 'rides', 'max_range'], defaults=((), (), None))
+
+__KING_OFFSETS = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1))
+__KNIGHT_OFFSETS = ((-1, -2), (-2, -1), (-2, 1), (-1, 2), (1, 2), (2, 1), (2, -1), (1, -2))
+__ROOK_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+__BISHOP_DIRECTIONS = ((1, 1), (-1, -1), (1, -1), (-1, 1))
+
+# definitions of the supported pieces, extended by register_piece
+PIECE_SPECS = {
+    KING: PieceSpec(leaps=__KING_OFFSETS),
+    KNIGHT: PieceSpec(leaps=__KNIGHT_OFFSETS),
+    ROOK: PieceSpec(rides=__ROOK_DIRECTIONS),
+    BISHOP: PieceSpec(rides=__BISHOP_DIRECTIONS),
+}
+
+# definitions of common fairy chess pieces, ready to be registered with register_piece
+FAIRY_PIECES = {
+    'queen': PieceSpec(rides=__ROOK_DIRECTIONS + __BISHOP_DIRECTIONS),
+    'camel': PieceSpec(leaps=((-1, -3), (-3, -1), (-3, 1), (-1, 3), (1, 3), (3, 1), (3, -1), (1, -3))),
+    'zebra': PieceSpec(leaps=((-2, -3), (-3, -2), (-3, 2), (-2, 3), (2, 3), (3, 2), (3, -2), (2, -3))),
+    'nightrider': PieceSpec(rides=__KNIGHT_OFFSETS),
+    'archbishop': PieceSpec(leaps=__KNIGHT_OFFSETS, rides=__BISHOP_DIRECTIONS),
+    'chancellor': PieceSpec(leaps=__KNIGHT_OFFSETS, rides=__ROOK_DIRECTIONS),
+    'amazon': PieceSpec(leaps=__KNIGHT_OFFSETS, rides=__ROOK_DIRECTIONS + __BISHOP_DIRECTIONS),
+    'wazir': PieceSpec(leaps=__ROOK_DIRECTIONS),
+    'ferz': PieceSpec(leaps=__BISHOP_DIRECTIONS),
+    'short_rook': PieceSpec(rides=__ROOK_DIRECTIONS, max_range=4),
+}
+
+# move generators, level expanders and step generators of the supported pieces on game boards of given dimensions:
+# a move generator maps the spots of a Board and the square index (row * num_cols + col) of the piece
+# to the list of square indices of its valid moves, a level expander maps the bitboard of the locations
+# of one level of a BFS and the bitboard of empty spots to the bitboard of locations reached with one more move,
+# and a step generator is a move generator connecting the same locations as the piece, riders moving
+# a single step along their directions since every location along a ray is reached step by step
+__Geometry = namedtuple('Geometry', ['move_generators', 'level_expanders', 'step_generators'])
+
+# geometries already built, keyed by (rows, cols)
+__geometries = dict()
+
+
+def __geometry(num_rows, num_cols):
     """
-    Generates all possible valid moves of the given piece from its current location
-    on the board.
-
-    :param board: a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
-     for a spot containing no chess piece, and character OCCUPIED_CHAR for a spot containing a
-     chess piece
-    :param cur_loc: an integer tuple representing the current location of the given chess piece on the game board
-    :param piece: the chess piece to be moved
-    :return: a set of integer tuples representing valid locations the given chess piece can move to on the game board
+    Returns the geometry of game boards of the given dimensions, building it the first time it's needed.
     """
-    if not is_within_board(cur_loc) or piece.lower() not in SUPPORTED_PIECES:
-        return None
+    geometry = __geometries.get((num_rows, num_cols))
+    if geometry is None:
+        geometry = __Geometry(dict(), dict(), dict())
+        for piece, spec in PIECE_SPECS.items():
+            __compile_piece(geometry, spec, piece, num_rows, num_cols)
+        __geometries[(num_rows, num_cols)] = geometry
+    return geometry
 
-    possible_moves = []
-    if piece.lower() == KING:
-        possible_moves = __gen_possible_king_moves(cur_loc)
-    if piece.lower() == ROOK:
-        possible_moves = __gen_possible_rook_moves(board, cur_loc)
-    if piece.lower() == KNIGHT:
-        possible_moves = __gen_possible_knight_moves(cur_loc)
-    if piece.lower() == BISHOP:
-        possible_moves = __gen_possible_bishop_moves(board, cur_loc)
 
-    return keep_valid_moves(board, possible_moves)
+def __compile_piece(geometry, spec, piece, num_rows, num_cols):
+    """
+    Adds the move generator, level expander and step generator of the given PieceSpec to the given geometry
+    of game boards of the given dimensions, under the name of the piece.
+    """
+    if not spec.rides:
+        move_generator = __leaper_move_generator(spec.leaps, num_rows, num_cols)
+        level_expander = __leaper_level_expander(spec.leaps, num_rows, num_cols)
+    elif not spec.leaps:
+        move_generator = __rider_move_generator(spec.rides, num_rows, num_cols, spec.max_range)
+        level_expander = __rider_level_expander(spec.rides, num_rows, num_cols, spec.max_range)
+    else:
+        gen_leaper_moves = __leaper_move_generator(spec.leaps, num_rows, num_cols)
+        gen_rider_moves = __rider_move_generator(spec.rides, num_rows, num_cols, spec.max_range)
+        expand_leaper_level = __leaper_level_expander(spec.leaps, num_rows, num_cols)
+        expand_rider_level = __rider_level_expander(spec.rides, num_rows, num_cols, spec.max_range)
+
+        def move_generator(cells, square):
+            return gen_leaper_moves(cells, square) + gen_rider_moves(cells, square)
+
+        def level_expander(frontier, empty):
+            return expand_leaper_level(frontier, empty) | expand_rider_level(frontier, empty)
+
+    geometry.move_generators[piece] = move_generator
+    geometry.level_expanders[piece] = level_expander
+    geometry.step_generators[piece] = move_generator if not spec.rides else \
+        __leaper_move_generator(spec.leaps + spec.rides, num_rows, num_cols)
+
+
+def __leaper_targets(offsets, num_rows, num_cols, square):
+    """
+    Returns the square indices of the locations within a game board of the given dimensions reached
+    by moving from the given square by any of the given offsets.
+    """
+    row, col = divmod(square, num_cols)
+    return [(row + add_to_row) * num_cols + col + add_to_col for add_to_row, add_to_col in offsets
+            if 0 <= row + add_to_row < num_rows and 0 <= col + add_to_col < num_cols]
 
 
-def __gen_possible_king_moves(cur_loc):
+def __leaper_move_generator(offsets, num_rows, num_cols):
     """
-    Generates all possible moves for a knight chess piece given its current location on the game board.
-    These moves are not necessarily all valid.
+    Returns the move generator of a piece moving by the given offsets, looking its targets up in a table
+    built once on boards of up to TABLE_MAX_SQUARES squares.
     """
-    row = cur_loc[0]
-    col = cur_loc[1]
+    if num_rows * num_cols <= TABLE_MAX_SQUARES:
+        table = [__leaper_targets(offsets, num_rows, num_cols, square) for square in range(num_rows * num_cols)]
 
-    possible_moves = [
-        (row - 1, col),
-        (row - 1, col + 1),
-        (row, col + 1),
-        (row + 1, col + 1),
-        (row + 1, col),
-        (row + 1, col - 1),
-        (row, col - 1),
-        (row - 1, col - 1)
-    ]
+        def gen_leaper_moves(cells, square):
+            return [target for target in table[square] if not cells[target]]
+        return gen_leaper_moves
 
-    return possible_moves
+    def gen_leaper_moves(cells, square):
+        return [target for target in __leaper_targets(offsets, num_rows, num_cols, square) if not cells[target]]
+    return gen_leaper_moves
 
 
-def __gen_possible_knight_moves(cur_loc):
+def __ray_steps(add_to_row, add_to_col, num_rows, num_cols, square, max_range=None):
     """
-    Generates all possible moves for a knight chess piece given its current location on the game board.
-    These moves are not necessarily all valid.
-    """
-    row = cur_loc[0]
-    col = cur_loc[1]
+    Returns the number of steps from the given square to the edge of a game board of the given dimensions
+    in the direction given by the increments to row and column, up to the given maximum number of steps,
+    along with the shift of the square index performed by a step.
 
-    possible_moves = [
-        (row - 1, col - 2),
-        (row - 2, col - 1),
-        (row - 2, col + 1),
-        (row - 1, col + 2),
-        (row + 1, col + 2),
-        (row + 2, col + 1),
-        (row + 2, col - 1),
-        (row + 1, col - 2)
-    ]
+    Ex: Given location (5,5) on an 8x8 board, addToRow=1, and addToCol=1, the ray
+    has 2 steps, (6,6) and (7,7) (diagonal down right), shifting square indices by 9.
+    """
+    row, col = divmod(square, num_cols)
+    # a direction that doesn't move along rows (or columns) never reaches their edge
+    unbounded = max(num_rows, num_cols)
+    steps = min((num_rows - 1 - row) // add_to_row if add_to_row > 0 else row // -add_to_row if add_to_row < 0
+                else unbounded,
+                (num_cols - 1 - col) // add_to_col if add_to_col > 0 else col // -add_to_col if add_to_col < 0
+                else unbounded)
+    if max_range is not None:
+        steps = min(steps, max_range)
+    return steps, add_to_row * num_cols + add_to_col
+
+
+def __rider_move_generator(directions, num_rows, num_cols, max_range=None):
+    """
+    Returns the move generator of a piece moving along rays in the given directions, up to the given maximum
+    number of steps. On boards of up to TABLE_MAX_SQUARES squares the rays of every square are looked up in
+    a table and walked until their closest blocker, while on larger boards the closest blocker is found with
+    a single search of the bytes of the spots along the ray.
+    """
+    if num_rows * num_cols <= TABLE_MAX_SQUARES:
+        table = []
+        for square in range(num_rows * num_cols):
+            rays = []
+            for add_to_row, add_to_col in directions:
+                steps, shift = __ray_steps(add_to_row, add_to_col, num_rows, num_cols, square, max_range)
+                rays.append(tuple(range(square + shift, square + (steps + 1) * shift, shift)) if steps else ())
+            table.append(rays)
+
+        def gen_rider_moves(cells, square):
+            moves = []
+            for ray in table[square]:
+                # the ray is cut at the closest blocker, dropping the blocker along with the rest of the ray behind it
+                for target in ray:
+                    if cells[target]:
+                        break
+                    moves.append(target)
+            return moves
+        return gen_rider_moves
+
+    def gen_rider_moves(cells, square):
+        moves = []
+        for add_to_row, add_to_col in directions:
+            steps, shift = __ray_steps(add_to_row, add_to_col, num_rows, num_cols, square, max_range)
+            if steps:
+                # the spots along the ray form a slice of the spots of the board, with a negative stop
+                # replaced by None so that the slice doesn't wrap around when going up to square 0
+                stop = square + (steps + 1) * shift
+                blocker = cells[square + shift:stop if stop >= 0 else None:shift].find(1)
+                targets = range(square + shift, stop, shift)
+                moves.extend(targets if blocker < 0 else targets[:blocker])
+        return moves
+    return gen_rider_moves
+
+
+def __build_shift(add_to_row, add_to_col, num_rows, num_cols):
+    """
+    Returns the bitboard of the locations from which moving by the given increments to row and column stays
+    within a game board of the given dimensions, along with the shift of the square index performed by that move.
+    """
+    shift = add_to_row * num_cols + add_to_col
+    rows = range(max(0, -add_to_row), min(num_rows, num_rows - add_to_row))
+    cols = range(max(0, -add_to_col), min(num_cols, num_cols - add_to_col))
+    if not rows or not cols:
+        return 0, shift
 
-    return possible_moves
+    # the bits of the columns of one row, multiplied by a number with a bit set at the start of every row
+    # of the range to repeat them within every row, rows being num_cols bits apart
+    row_bits = ((1 << len(cols)) - 1) << cols.start
+    repeat = ((1 << (len(rows) * num_cols)) - 1) // ((1 << num_cols) - 1)
+    return (row_bits * repeat) << (rows.start * num_cols), shift
 
 
-def __gen_possible_rook_moves(board, cur_loc):
+def __leaper_level_expander(offsets, num_rows, num_cols):
     """
-    Generates all possible valid moves for a rook chess piece given its current location on the game board.
+    Returns the level expander of a piece moving by the given offsets, shifting all the locations of a level
+    at once by every offset.
     """
-    possible_moves = []
+    shifts = [__build_shift(add_to_row, add_to_col, num_rows, num_cols) for add_to_row, add_to_col in offsets]
 
-    __gen_moves_in_direction(board, possible_moves, cur_loc, 1, 0)
-    __gen_moves_in_direction(board, possible_moves, cur_loc, -1, 0)
-    __gen_moves_in_direction(board, possible_moves, cur_loc, 0, 1)
-    __gen_moves_in_direction(board, possible_moves, cur_loc, 0, -1)
+    def expand_leaper_level(frontier, empty):
+        reached = 0
+        for sources, shift in shifts:
+            if shift > 0:
+                reached |= (frontier & sources) << shift
+            else:
+                reached |= (frontier & sources) >> -shift
+        return reached & empty
+    return expand_leaper_level
 
-    return possible_moves
+
+def __rider_level_expander(directions, num_rows, num_cols, max_range=None):
+    """
+    Returns the level expander of a piece moving along rays in the given directions, sliding all the locations
+    of a level at once along every direction with an occluded fill: the ray is extended by 1, 2, 4... steps
+    through the empty spots, so the longest ray of the board is covered in a logarithmic number of shifts.
+    Rays limited to a maximum number of steps shorter than the board are extended one step at a time instead.
+    """
+    # the locations a step in every direction can land on, along with the shift of that step
+    steps = []
+    for add_to_row, add_to_col in directions:
+        sources, shift = __build_shift(add_to_row, add_to_col, num_rows, num_cols)
+        steps.append((sources << shift if shift > 0 else sources >> -shift, shift))
+    rounds = max(num_rows, num_cols).bit_length()
+
+    if max_range is not None and max_range < max(num_rows, num_cols):
+        def expand_limited_rider_level(frontier, empty):
+            reached = 0
+            for targets, shift in steps:
+                ray = frontier
+                passable = targets & empty
+                for step in range(max_range):
+                    ray = passable & (ray << shift if shift > 0 else ray >> -shift)
+                    if not ray:
+                        break
+                    reached |= ray
+            return reached
+        return expand_limited_rider_level
+
+    def expand_rider_level(frontier, empty):
+        reached = 0
+        for targets, shift in steps:
+            ray = frontier
+            # locations the ray can pass through with a step of the current length
+            passable = targets & empty
+            for round_shift in (shift << round_index for round_index in range(rounds)):
+                if round_shift > 0:
+                    ray |= passable & (ray << round_shift)
+                    passable &= passable << round_shift
+                else:
+                    ray |= passable & (ray >> -round_shift)
+                    passable &= passable >> -round_shift
+            reached |= ray
+        return reached & empty
+    return expand_rider_level
+
+
+# geometry of game boards of the default dimensions, built once at import
+__geometry(NUM_ROWS, NUM_COLS)
+
+
+def move_generator(board, piece):
+    """
+    Returns the move generator of the given piece on game boards of the dimensions of the given board.
+
+    :param board: a Board or a 2D list of characters representing the game board
+    :param piece: the chess piece to be moved
+    :return: a function mapping the spots of a Board (its cells) and the square index (row * num_cols + col)
+     of the piece to the list of square indices of its valid moves, or None if the piece isn't supported
+    """
+    if piece.lower() not in SUPPORTED_PIECES:
+        return None
+    board = __as_board(board)
+    return __geometry(board.num_rows, board.num_cols).move_generators[piece.lower()]
 
 
-def __gen_possible_bishop_moves(board, cur_loc):
+def register_piece(name, spec):
+    """
+    Registers a chess piece defined by a PieceSpec, e.g. one of FAIRY_PIECES, making it a supported piece
+    of every function of the module. The spec is compiled into the same move tables, level expanders and
+    step generators as the built-in pieces the first time a board of given dimensions is searched, so the
+    piece searches as fast as they do.
+
+    :param name: the name of the piece, used as the piece argument of the other functions
+    :param spec: the PieceSpec of the piece, its offsets and directions being completed with their opposites
+    :return: the PieceSpec registered
     """
-    Generates all possible valid moves for a bishop chess piece given its current location on the game board.
+    name = name.lower()
+    if name in PIECE_SPECS:
+        raise ValueError('piece already registered: {!r}'.format(name))
+
+    leaps = __with_opposites(spec.leaps)
+    rides = __with_opposites(spec.rides)
+    if not leaps and not rides:
+        raise ValueError('piece without moves: {!r}'.format(name))
+    if (0, 0) in leaps or (0, 0) in rides:
+        raise ValueError('null move of piece: {!r}'.format(name))
+    if spec.max_range is not None and spec.max_range < 1:
+        raise ValueError('maximum range of piece below 1: {!r}'.format(name))
+
+    spec = PieceSpec(leaps, rides, spec.max_range)
+    PIECE_SPECS[name] = spec
+    SUPPORTED_PIECES.add(name)
+    __MOVES_BOUNDS[name] = __spec_moves_bound(spec)
+    for (num_rows, num_cols), geometry in __geometries.items():
+        __compile_piece(geometry, spec, name, num_rows, num_cols)
+    return spec
+
+
+def unregister_piece(name):
     """
-    possible_moves = []
+    Unregisters a chess piece registered with register_piece, dropping the paths of the path cache. Boards keep
+    the connected components labelled for the piece, so the name shouldn't be reused for a piece moving differently.
 
-    __gen_moves_in_direction(board, possible_moves, cur_loc, 1, 1)
-    __gen_moves_in_direction(board, possible_moves, cur_loc, -1, -1)
-    __gen_moves_in_direction(board, possible_moves, cur_loc, 1, -1)
-    __gen_moves_in_direction(board, possible_moves, cur_loc, -1, 1)
+    :param name: the name of the piece
+    """
+    name = name.lower()
+    if name not in PIECE_SPECS or name in (KING, KNIGHT, ROOK, BISHOP):
+        raise ValueError('not a registered piece: {!r}'.format(name))
 
-    return possible_moves
+    del PIECE_SPECS[name]
+    SUPPORTED_PIECES.discard(name)
+    del __MOVES_BOUNDS[name]
+    for geometry in __geometries.values():
+        for pieces in geometry:
+            pieces.pop(name, None)
+    if __path_cache is not None:
+        __path_cache.clear()
 
 
-def __gen_moves_in_direction(board, moves_list, cur_loc, add_to_row, add_to_col):
+def __with_opposites(offsets):
+    """
+    Returns the given (to row, to col) offsets as a tuple of int tuples, followed by the opposites not among them.
     """
-    Generates moves in any straight line direction based on current location and
-    given increments to row and column.
+    offsets = tuple((int(add_to_row), int(add_to_col)) for add_to_row, add_to_col in offsets)
+    return offsets + tuple(opposite for opposite in dict.fromkeys((-add_to_row, -add_to_col)
+                                                                  for add_to_row, add_to_col in offsets)
+                           if opposite not in offsets)
 
 
-    Ex: Given location (0,0), addToRow=1, and addToCol=1, function will return
-    (1,1), (2,2), (3,3), etc. (diagonal down right) until edge of the game board
-    is reached or until spot is occupied.
+def generate_possible_moves(board, cur_loc, piece, stats=None):
     """
-    row = cur_loc[0] + add_to_row
-    col = cur_loc[1] + add_to_col
+    Generates all possible valid moves of the given piece from its current location
+    on the board.
 
-    # generate moves in the direction specified by add_to_row/add_to_col until
-    # moving in that direction is no longer valid (reaches edge of board or collides with other chess piece)
-    while is_within_board((row, col)) and not is_occupied_spot(board, (row, col)):
-        moves_list.append((row, col))
-        row += add_to_row
-        col += add_to_col
+    :param board: a Board or a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
+     for a spot containing no chess piece, and character OCCUPIED_CHAR for a spot containing a
+     chess piece
+    :param cur_loc: an integer tuple representing the current location of the given chess piece on the game board
+    :param piece: the chess piece to be moved
+    :param stats: an optional SearchStats to fill in with the moves generated and rejected, and the time taken
+    :return: a set of integer tuples representing valid locations the given chess piece can move to on the game board
+    """
+    if not is_within_board(cur_loc, board) or piece.lower() not in SUPPORTED_PIECES:
+        return None
+
+    if stats is None and not isinstance(board, Board):
+        # a single location of a 2D list is checked per move, rather than converting the whole board
+        return __gen_grid_moves(board, cur_loc, PIECE_SPECS[piece.lower()])
 
+    board = __as_board(board)
+    gen_moves = __geometry(board.num_rows, board.num_cols).move_generators[piece.lower()]
+    if stats is not None:
+        gen_moves = __instrumented_move_generator(gen_moves, stats, len(board.cells))
+        started = (time.perf_counter(), stats.movegen_seconds)
+    moves = gen_moves(board.cells, cur_loc[0] * board.num_cols + cur_loc[1])
+    possible_moves = {divmod(square, board.num_cols) for square in moves}
 
-def keep_valid_moves(board, possible_moves):
+    if stats is not None:
+        __record_bookkeeping(stats, started)
+
+    return possible_moves
+
+
+def __gen_grid_moves(grid, cur_loc, spec):
+    """
+    Returns the set of locations a piece defined by the given PieceSpec can move to from the given location
+    of a 2D list of characters, checking only the characters of the locations it moves to or over.
+    """
+    num_rows, num_cols = len(grid), len(grid[0])
+    row, col = cur_loc
+    possible_moves = {(row + add_to_row, col + add_to_col) for add_to_row, add_to_col in spec.leaps
+                      if 0 <= row + add_to_row < num_rows and 0 <= col + add_to_col < num_cols and
+                      grid[row + add_to_row][col + add_to_col] != OCCUPIED_CHAR}
+
+    max_range = spec.max_range if spec.max_range is not None else max(num_rows, num_cols)
+    for add_to_row, add_to_col in spec.rides:
+        move_row, move_col = row + add_to_row, col + add_to_col
+        for step in range(max_range):
+            if not (0 <= move_row < num_rows and 0 <= move_col < num_cols) or grid[move_row][move_col] == OCCUPIED_CHAR:
+                break
+            possible_moves.add((move_row, move_col))
+            move_row, move_col = move_row + add_to_row, move_col + add_to_col
+
+    return possible_moves
+
+
+def keep_valid_moves(board, possible_moves, stats=None):
     """
     Returns the set of moves that are valid: not occupied and within the dimensions of
     the game board.
 
-    :param board: a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
+    :param board: a Board or a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
      for a spot containing no chess piece, and character OCCUPIED_CHAR for a spot containing a
      chess piece
     :param possible_moves: a set of integer tuples representing the moves to check for validity on the game board
+    :param stats: an optional SearchStats to fill in with the number of moves rejected
     :return: a set of integer tuples representing moves that are valid on the game board
     """
     possible_valid_moves = set()
-    for move in possible_moves:
-        if is_within_board(move) and not is_occupied_spot(board, move):
-            possible_valid_moves.add(move)
+    if isinstance(board, Board):
+        # a move is kept when its byte in the spots of the board is 0
+        cells = board.cells
+        for move in possible_moves:
+            if board.is_within(move) and not cells[move[0] * board.num_cols + move[1]]:
+                possible_valid_moves.add(move)
+    else:
+        for move in possible_moves:
+            if is_within_board(move, board) and not is_occupied_spot(board, move):
+                possible_valid_moves.add(move)
+
+    if stats is not None:
+        stats.moves_rejected += len(set(possible_moves)) - len(possible_valid_moves)
     return possible_valid_moves
 
 
-def is_on_same_color(first_loc, second_loc):
+def is_on_same_color(first_loc, second_loc, board=None):
     """
     Determines if the two given locations appear on the same 'color'
     (traditionally white and black) of the chess board.
 
     :param first_loc: an integer tuple representing the first location to compare
     :param second_loc: an integer tuple representing the second location to compare
+    :param board: the game board the locations lie on, see is_within_board
     :return: True if the two given locations appear on the same color on the game board,
      False if they appear on different colors, or None if they're not within bounds of the game board
     """
     # One color necessarily has row/col values always following the pattern 'even/even' or 'edd/odd'.
     # The other color necessarily has 'row/col' values always following the pattern 'even/odd' or 'odd/even'.
     # Locations appear on same color if they have same pattern of even and odd values.
-    if not is_within_board(first_loc) or not is_within_board(second_loc):
+    if not is_within_board(first_loc, board) or not is_within_board(second_loc, board):
         return None
     return (first_loc[0] % 2 == first_loc[1] % 2) == (second_loc[0] % 2 == second_loc[1] % 2)
 
 
-def find_shortest_path(board, start_loc, end_loc, piece):
+def find_shortest_path(board, start_loc, end_loc, piece, search=None, stats=None, compact=False):
     """
     Finds a shortest path between the given start and end locations
     for the given chess piece on the game board.
 
-    :param board: a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
+    :param board: a Board or a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
      for a spot containing no chess piece, and character OCCUPIED_CHAR for a spot containing a
      chess piece
     :param start_loc: an integer tuple representing the starting location of the given chess piece
     :param end_loc: an integer tuple representing the desired end location of the given chess piece
     :param piece: the chess piece for which the shortest path is to be found
+    :param search: the search to run, BFS, BIDIRECTIONAL (searching from both the start and end locations
+     until they meet) or ASTAR (expanding first the locations with the lowest bound on the number of moves
+     of a path through them), or None for BFS, finding the same paths as find_shortest_paths_batch
+    :param stats: an optional SearchStats to fill in with the search run, the number of nodes it expanded,
+     the moves it generated and rejected, its largest frontier and the time it spent generating moves and otherwise
+    :param compact: True to return the path as an array of square indices (row * num_cols + col), of typecode 'H'
+     on boards of up to 65536 squares and 'I' on larger boards, rather than a list of locations
     :return: a list of locations on the game board required to travel from the given start
      to the given end location (in sequential order), including the start and end locations themselves,
      or None if no path can be found
     """
-    if not is_within_board(start_loc) or \
-            not is_within_board(end_loc) or \
-            is_occupied_spot(board, end_loc):
-        return None
+    keeps_components = isinstance(board, Board)
+    board = __as_board(board)
 
-    if start_loc == end_loc:
-        return [start_loc]
-    elif piece.lower() == 'bishop' and not is_on_same_color(start_loc, end_loc):
+    if not __is_possible_query(board, start_loc, end_loc, piece):
         return None
 
-    # perform search to find end location and generate path from search
-    loc_to_parent = __breadth_first_search(board, start_loc, end_loc, piece)
-
-    if loc_to_parent is None:
+    num_cols = board.num_cols
+    if start_loc == end_loc:
+        path = [start_loc[0] * num_cols + start_loc[1]]
+        return __compact_path(board, path) if compact else [divmod(path[0], num_cols)]
+
+    cache = __path_cache
+    if cache is not None:
+        start_loc = tuple(start_loc)
+        end_loc = tuple(end_loc)
+        hit, path = cache.lookup(board, start_loc, end_loc, piece.lower())
+        if hit:
+            if compact and path is not None:
+                return __compact_path(board, [row * num_cols + col for row, col in path])
+            return path
+
+    # no search between locations known to lie in different connected components
+    if not __is_connected(board, start_loc, end_loc, piece):
         return None
 
-    path = __backtrace(loc_to_parent, start_loc, end_loc)
+    if search is None:
+        search = BFS
+    elif search not in SUPPORTED_SEARCHES:
+        raise ValueError('unsupported search: {!r}'.format(search))
+
+    if search == BIDIRECTIONAL:
+        path = __bidirectional_search(board, start_loc, end_loc, piece, stats)
+    elif search == ASTAR:
+        path = __astar_search(board, start_loc, end_loc, piece, stats)
+    else:
+        # perform search to find end location and generate path from search
+        end_square = end_loc[0] * num_cols + end_loc[1]
+        square_to_parent = __breadth_first_search(board, [start_loc], {end_square}, piece, stats)
+
+        if square_to_parent[end_square] < 0:
+            path = None
+        else:
+            path = __backtrace(square_to_parent, start_loc, end_loc, num_cols)
+
+    # label the connected components of a Board on which a search found no path,
+    # so that later queries between the same components aren't searched
+    if path is None and keeps_components:
+        __component_labels(board, piece.lower())
+
+    # paths are found as lists of square indices, and only turned into locations at the edge
+    if compact and cache is None:
+        return None if path is None else __compact_path(board, path)
+    if path is not None:
+        path = [divmod(square, num_cols) for square in path]
+
+    if cache is not None:
+        cache.store(board, start_loc, end_loc, piece.lower(), path)
+        if compact and path is not None:
+            return __compact_path(board, [row * num_cols + col for row, col in path])
 
     return path
 
 
-def find_min_moves(board, start_loc, end_loc, piece):
+def find_min_moves(board, start_loc, end_loc, piece, search=None, stats=None):
     """
     Finds the minimum number of moves required to get from start to end location
     of the specified piece on the given game board, should one exist.
 
-    :param board: a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
+    :param board: a Board or a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
      for a spot containing no chess piece, and character OCCUPIED_CHAR for a spot containing a
      chess piece
     :param start_loc: an integer tuple representing the starting location of the given chess piece
     :param end_loc: an integer tuple representing the desired end location of the given chess piece
     :param piece: the chess piece for which the minimum number of moves is to be found
+    :param search: the search to run should one be required, see find_shortest_path, None running a BFS
+     that expands every level of the search at once through bitboard operations
+    :param stats: an optional SearchStats to fill in with the search run, the number of nodes it expanded,
+     the moves it generated and rejected, its largest frontier and the time it spent generating moves and otherwise
     :return: the minimum number of moves required to move from start to end location, or None if
     there is no possible path between the given start and end locations
     """
+    keeps_components = isinstance(board, Board)
+    board = __as_board(board)
 
-    path = find_shortest_path(board, start_loc, end_loc, piece)
+    if not __is_possible_query(board, start_loc, end_loc, piece):
+        return None
 
-    if path is None:
+    if start_loc == end_loc:
+        return 0
+
+    return __min_moves(board, start_loc, end_loc, piece.lower(), search, stats, keeps_components)
+
+
+def find_min_moves_all_pieces(board, start_loc, end_loc, search=None, stats=None):
+    """
+    Finds the minimum number of moves required to get from start to end location for every supported chess
+    piece on the given game board, checking the board and locations once for all the pieces.
+
+    :param board: a Board or a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
+     for a spot containing no chess piece, and character OCCUPIED_CHAR for a spot containing a
+     chess piece
+    :param start_loc: an integer tuple representing the starting location of the chess pieces
+    :param end_loc: an integer tuple representing the desired end location of the chess pieces
+    :param search: the search to run should one be required, see find_min_moves
+    :param stats: an optional SearchStats to fill in with the statistics of the searches of all the pieces
+    :return: a dict mapping every supported piece to its minimum number of moves as returned by find_min_moves,
+     None for the pieces without a path
+    """
+    keeps_components = isinstance(board, Board)
+    board = __as_board(board)
+
+    # the checks shared by every piece, the bishop also requiring both locations to be on the same color
+    if not __is_possible_query(board, start_loc, end_loc, KING):
+        return {piece: None for piece in sorted(SUPPORTED_PIECES)}
+    if start_loc == end_loc:
+        return {piece: 0 for piece in sorted(SUPPORTED_PIECES)}
+
+    same_color = is_on_same_color(start_loc, end_loc, board)
+    return {piece: __min_moves(board, start_loc, end_loc, piece, search, stats, keeps_components)
+            if piece != BISHOP or same_color else None
+            for piece in sorted(SUPPORTED_PIECES)}
+
+
+def find_min_moves_multi(board, start_locs, end_locs, piece, stats=None):
+    """
+    Finds the minimum number of moves required to get from any of the start locations to the nearest of
+    the end locations for the given chess piece, with a single search started from every start location
+    at once and stopped at the first end location it reaches, rather than a search per pair of locations.
+
+    :param board: a Board or a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
+     for a spot containing no chess piece, and character OCCUPIED_CHAR for a spot containing a
+     chess piece
+    :param start_locs: an iterable of integer tuples representing the starting locations of the given chess piece
+    :param end_locs: an iterable of integer tuples representing the desired end locations of the given chess piece
+    :param piece: the chess piece for which the minimum number of moves is to be found
+    :param stats: an optional SearchStats to fill in with the search run, see find_min_moves
+    :return: a tuple of the minimum number of moves, the start location and end location between which
+     it's achieved, and a shortest path between them as returned by find_shortest_path, or None if there
+     is no possible path from any start location to any end location
+    """
+    keeps_components = isinstance(board, Board)
+    board = __as_board(board)
+    num_cols = board.num_cols
+
+    start_locs = [tuple(start_loc) for start_loc in start_locs if board.is_within(start_loc)]
+    # the end locations any start location may be connected to, in the order given
+    end_locs = [tuple(end_loc) for end_loc in end_locs
+                if any(__is_possible_query(board, start_loc, end_loc, piece) and
+                       __is_connected(board, start_loc, end_loc, piece) for start_loc in start_locs)]
+    if not end_locs:
         return None
 
-    return len(path) - 1
+    start_squares = {start_loc[0] * num_cols + start_loc[1] for start_loc in start_locs}
+    for end_loc in end_locs:
+        if end_loc[0] * num_cols + end_loc[1] in start_squares:
+            return 0, end_loc, end_loc, [end_loc]
+
+    targets = {end_loc[0] * num_cols + end_loc[1] for end_loc in end_locs}
+    square_to_parent = __breadth_first_search(board, start_locs, targets, piece, stats, nearest=True)
+
+    # every end location reached was reached at the same level, the one the search stopped at
+    for end_loc in end_locs:
+        cur_square = end_loc[0] * num_cols + end_loc[1]
+        if square_to_parent[cur_square] >= 0:
+            while square_to_parent[cur_square] != cur_square:
+                cur_square = square_to_parent[cur_square]
+            start_loc = divmod(cur_square, num_cols)
+            path = [divmod(square, num_cols) for square in __backtrace(square_to_parent, start_loc, end_loc, num_cols)]
+            return len(path) - 1, start_loc, end_loc, path
+
+    # label the connected components of a Board on which a search found no path, see find_shortest_path
+    if keeps_components:
+        __component_labels(board, piece.lower())
+    return None
+
+
+def count_shortest_paths(board, start_loc, end_loc, piece):
+    """
+    Counts the distinct shortest paths between the given start and end locations for the given chess piece
+    on the game board, adding up the counts of the paths to every location one BFS level at a time rather
+    than enumerating the paths.
+
+    :param board: a Board or a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
+     for a spot containing no chess piece, and character OCCUPIED_CHAR for a spot containing a
+     chess piece
+    :param start_loc: an integer tuple representing the starting location of the given chess piece
+    :param end_loc: an integer tuple representing the desired end location of the given chess piece
+    :param piece: the chess piece for which the shortest paths are to be counted
+    :return: the exact number of shortest paths, 0 if there's no path, or None if either location isn't within
+     the bounds of the game board or the piece isn't supported
+    """
+    board = __as_board(board)
+
+    if not board.is_within(start_loc) or not board.is_within(end_loc) or piece.lower() not in SUPPORTED_PIECES:
+        return None
+
+    if not __is_possible_query(board, start_loc, end_loc, piece) or not __is_connected(board, start_loc, end_loc, piece):
+        return 0
+
+    if start_loc == end_loc:
+        return 1
+
+    return __layered_search(board, start_loc, end_loc, piece)[1]
+
+
+def iter_shortest_paths(board, start_loc, end_loc, piece):
+    """
+    Generates every distinct shortest path between the given start and end locations for the given chess piece
+    on the game board, one at a time. Paths are built back from the end location, only ever stepping to a
+    location one BFS level closer to the start location, so no partial path is abandoned.
+
+    :param board: a Board or a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
+     for a spot containing no chess piece, and character OCCUPIED_CHAR for a spot containing a
+     chess piece
+    :param start_loc: an integer tuple representing the starting location of the given chess piece
+    :param end_loc: an integer tuple representing the desired end location of the given chess piece
+    :param piece: the chess piece for which the shortest paths are to be generated
+    :return: a generator of the shortest paths, as lists of locations in the format returned by find_shortest_path,
+     generating none if there's no path, or None if either location isn't within the bounds of the game board
+     or the piece isn't supported
+    """
+    board = __as_board(board)
+
+    if not board.is_within(start_loc) or not board.is_within(end_loc) or piece.lower() not in SUPPORTED_PIECES:
+        return None
+
+    if not __is_possible_query(board, start_loc, end_loc, piece) or not __is_connected(board, start_loc, end_loc, piece):
+        return iter(())
+
+    if start_loc == end_loc:
+        return iter([[tuple(start_loc)]])
+
+    square_to_level, num_paths = __layered_search(board, start_loc, end_loc, piece)
+    if not num_paths:
+        return iter(())
+
+    return __generate_paths(board, start_loc, end_loc, piece, square_to_level)
+
+
+def find_shortest_paths_batch(board, queries, piece):
+    """
+    Finds a shortest path for every query of start and end locations on the game board. Queries sharing
+    a start location and chess piece are answered by a single BFS, finding the same paths as find_shortest_path.
+
+    :param board: a Board or a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
+     for a spot containing no chess piece, and character OCCUPIED_CHAR for a spot containing a
+     chess piece
+    :param queries: an iterable of (start location, end location) tuples, or of (start location, end location, piece)
+     tuples to override the chess piece of a query
+    :param piece: the chess piece for which the shortest paths are to be found
+    :return: a list holding, in the order of the queries, the shortest path of every query as returned by
+     find_shortest_path, or None for the queries without a path
+    """
+    board = __as_board(board)
+    paths = []
+    # queries which require a search, as (index, start location, end location, piece) tuples
+    pending = []
+
+    for query in queries:
+        start_loc, end_loc, query_piece = __unpack_query(query, piece)
+        if not __is_possible_query(board, start_loc, end_loc, query_piece) or \
+                not __is_connected(board, start_loc, end_loc, query_piece):
+            paths.append(None)
+        elif start_loc == end_loc:
+            paths.append([start_loc])
+        else:
+            paths.append(None)
+            pending.append((len(paths) - 1, start_loc, end_loc, query_piece))
 
+    for index, path in __search_batch(board, pending):
+        paths[index] = path
 
-def __breadth_first_search(board, start_loc, end_loc, piece):
+    return paths
+
+
+def find_min_moves_batch(board, queries, piece):
+    """
+    Finds the minimum number of moves for every query of start and end locations on the game board.
+    Queries sharing a start location and chess piece are answered by a single search.
+
+    :param board: a Board or a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
+     for a spot containing no chess piece, and character OCCUPIED_CHAR for a spot containing a
+     chess piece
+    :param queries: an iterable of (start location, end location) tuples, or of (start location, end location, piece)
+     tuples to override the chess piece of a query
+    :param piece: the chess piece for which the minimum numbers of moves are to be found
+    :return: a list holding, in the order of the queries, the minimum number of moves of every query as
+     returned by find_min_moves, or None for the queries without a path
     """
-    # Performs a BFS from given start to end location constrained by the possible moves
-    of the given piece on the given game board. Returns None if the search fails.
+    board = __as_board(board)
+    min_moves = []
+    # queries which require a search, as (index, start location, end location, piece) tuples
+    pending = []
+
+    for query in queries:
+        start_loc, end_loc, query_piece = __unpack_query(query, piece)
+        if not __is_possible_query(board, start_loc, end_loc, query_piece) or \
+                not __is_connected(board, start_loc, end_loc, query_piece):
+            min_moves.append(None)
+        elif start_loc == end_loc:
+            min_moves.append(0)
+        else:
+            table_min_moves = __table_min_moves(board, start_loc, end_loc, query_piece)
+            if table_min_moves is not None:
+                min_moves.append(None if table_min_moves == UNREACHABLE else table_min_moves)
+                continue
+            min_moves.append(__closed_form_min_moves(board, start_loc, end_loc, query_piece))
+            if min_moves[-1] is None:
+                pending.append((len(min_moves) - 1, start_loc, end_loc, query_piece))
+
+    for index, path in __search_batch(board, pending):
+        min_moves[index] = None if path is None else len(path) - 1
+
+    return min_moves
+
+
+def distance_field(board, start_loc, piece):
     """
-    # queue to maintain the fringe nodes of the BFS
-    queue = Queue()
-    queue.put(start_loc)
+    Finds the minimum number of moves required to get from the start location to every location of the
+    game board for the given chess piece, with a single search run to completion.
 
-    # set of locations already seen during traversal to avoid cycles during search
-    seen = set()
-    seen.add(start_loc)
+    :param board: a Board or a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
+     for a spot containing no chess piece, and character OCCUPIED_CHAR for a spot containing a
+     chess piece
+    :param start_loc: an integer tuple representing the starting location of the given chess piece
+    :param piece: the chess piece for which the minimum numbers of moves are to be found
+    :return: a tuple of a 2D list holding the minimum number of moves to every location of the game board,
+     or None for the locations that can't be reached, and a mapping from every reached location other than
+     the start location to the location it's reached from along a shortest path (see reconstruct_path),
+     or None if the start location isn't within the bounds of the game board
+    """
+    if not is_within_board(start_loc, board) or piece.lower() not in SUPPORTED_PIECES:
+        return None
+
+    board = __as_board(board)
+    num_cols = board.num_cols
+    start_loc = tuple(start_loc)
+    square_to_parent = __breadth_first_search(board, [start_loc], None, piece)
 
-    # mapping from a board location to the location it came from during search
-    # ex: (0, 1) -> (0, 0) when performing search starting at location (0,0)
+    start = start_loc[0] * num_cols + start_loc[1]
+    square_distances = array('i', [UNREACHABLE]) * len(square_to_parent)
+    square_distances[start] = 0
+    distances = [[None] * num_cols for row in range(board.num_rows)]
+    distances[start_loc[0]][start_loc[1]] = 0
     loc_to_parent = dict()
 
-    # perform BFS by iterating through the fringe nodes and checking for the end location
-    while not queue.empty():
-        cur_loc = queue.get()
-        possible_moves = generate_possible_moves(board, cur_loc, piece)
-        for loc in possible_moves:
-            # if we haven't already seen this loc before,
-            # note the location it came from, add it to the fringe of the BFS, and mark it seen
-            if loc not in seen:
-                loc_to_parent[loc] = cur_loc
-                queue.put(loc)
-                seen.add(loc)
-            if loc == end_loc:
-                return loc_to_parent
+    for square, parent in enumerate(square_to_parent):
+        if parent < 0 or square == start:
+            continue
+        loc = divmod(square, num_cols)
+        loc_to_parent[loc] = divmod(parent, num_cols)
+        if square_distances[square] != UNREACHABLE:
+            continue
+
+        # walk up the parents of the square until one with a known distance, then count back down
+        chain = []
+        while square_distances[square] == UNREACHABLE:
+            chain.append(square)
+            square = square_to_parent[square]
+        distance = square_distances[square]
+        for square in reversed(chain):
+            distance += 1
+            square_distances[square] = distance
+            row, col = divmod(square, num_cols)
+            distances[row][col] = distance
+
+    return distances, loc_to_parent
+
+
+def distance_fields(occupancy, start_loc, piece):
+    """
+    Finds the minimum number of moves required to get from the start location to every location for the given
+    chess piece on every game board of a stack at once, expanding each level of the search on all boards
+    together through numpy array operations. Requires numpy.
+
+    :param occupancy: an array-like of booleans with shape (number of boards, rows, cols), True marking the
+     spots occupied by a chess piece
+    :param start_loc: an integer tuple representing the starting location of the given chess piece on every board
+    :param piece: the chess piece for which the minimum numbers of moves are to be found
+    :return: a numpy integer array with the same shape as occupancy holding the minimum number of moves to every
+     location of every board, or UNREACHABLE for the locations that can't be reached,
+     or None if the start location isn't within the bounds of the boards
+    """
+    if numpy is None:
+        raise ImportError('distance_fields requires numpy')
+
+    empty = ~numpy.asarray(occupancy, dtype=bool)
+    num_rows, num_cols = empty.shape[1:]
+    if not (0 <= start_loc[0] < num_rows and 0 <= start_loc[1] < num_cols) or piece.lower() not in SUPPORTED_PIECES:
+        return None
+
+    piece = piece.lower()
+    distances = numpy.full(empty.shape, UNREACHABLE, dtype=numpy.int32)
+    distances[:, start_loc[0], start_loc[1]] = 0
+
+    # boolean arrays of the locations of the current level on every board and of all locations already seen
+    frontier = numpy.zeros(empty.shape, dtype=bool)
+    frontier[:, start_loc[0], start_loc[1]] = True
+    seen = frontier.copy()
+    level = 0
+
+    while frontier.any():
+        level += 1
+        reached = numpy.zeros(empty.shape, dtype=bool)
+        spec = PIECE_SPECS[piece]
+        for add_to_row, add_to_col in spec.leaps:
+            reached |= __shift_boards(frontier, add_to_row, add_to_col) & empty
+        # slide every location along a direction one step at a time, masking the ray with the empty spots
+        for add_to_row, add_to_col in spec.rides:
+            ray = frontier
+            steps = 0
+            while spec.max_range is None or steps < spec.max_range:
+                ray = __shift_boards(ray, add_to_row, add_to_col) & empty
+                if not ray.any():
+                    break
+                reached |= ray
+                steps += 1
+        frontier = reached & ~seen
+        seen |= frontier
+        distances[frontier] = level
+
+    return distances
+
+
+def __shift_boards(boards, add_to_row, add_to_col):
+    """
+    Returns a copy of the given (number of boards, rows, cols) boolean array with every location moved by the given
+    increments to row and column, the locations moved out of the bounds of the boards being dropped.
+    """
+    num_rows, num_cols = boards.shape[1:]
+    shifted = numpy.zeros_like(boards)
+    if abs(add_to_row) >= num_rows or abs(add_to_col) >= num_cols:
+        return shifted
+    shifted[:, max(add_to_row, 0):num_rows + min(add_to_row, 0), max(add_to_col, 0):num_cols + min(add_to_col, 0)] = \
+        boards[:, max(-add_to_row, 0):num_rows + min(-add_to_row, 0), max(-add_to_col, 0):num_cols + min(-add_to_col, 0)]
+    return shifted
+
+
+def connected_components(board, piece):
+    """
+    Labels the connected components of the free locations of the game board for the given chess piece: two free
+    locations get the same label when the piece can travel between them. The labels of a Board are computed
+    once and kept with it until its spots change, and find_shortest_path, find_min_moves and the batch queries
+    answer queries between locations of different components without any search. They also compute the labels
+    themselves the first time a search on a Board finds no path.
+
+    :param board: a Board or a 2D list of characters representing the game board, with dimensions HEIGHT and LENGTH, character EMPTY_CHAR
+     for a spot containing no chess piece, and character OCCUPIED_CHAR for a spot containing a
+     chess piece
+    :param piece: the chess piece for which the connected components are to be labelled
+    :return: a 2D list holding the label (from 0) of the component of every location of the game board,
+     or None for the occupied locations, or None if the piece isn't supported
+    """
+    if piece.lower() not in SUPPORTED_PIECES:
+        return None
+
+    board = __as_board(board)
+    labels = __component_labels(board, piece.lower())
+    num_cols = board.num_cols
+    return [[None if label < 0 else label for label in labels[row * num_cols:(row + 1) * num_cols]]
+            for row in range(board.num_rows)]
+
+
+def reconstruct_path(loc_to_parent, start_loc, end_loc):
+    """
+    Reconstructs a shortest path from the mapping of locations to their parent location returned by distance_field.
+
+    :param loc_to_parent: the mapping of locations to their parent location returned by distance_field
+    :param start_loc: an integer tuple representing the start location given to distance_field
+    :param end_loc: an integer tuple representing the desired end location
+    :return: a list of locations on the game board required to travel from the given start
+     to the given end location (in sequential order), including the start and end locations themselves,
+     or None if the end location can't be reached
+    """
+    start_loc = tuple(start_loc)
+    cur_loc = tuple(end_loc)
+    if cur_loc != start_loc and cur_loc not in loc_to_parent:
+        return None
+
+    path = [cur_loc]
+    while cur_loc != start_loc:
+        cur_loc = loc_to_parent[cur_loc]
+        path.append(cur_loc)
+    path.reverse()
+
+    return path
+
+
+# file of the minimum numbers of moves between every pair of locations of empty boards, written by
+# write_distance_tables and memory mapped the first time find_min_moves looks a query up in it
+DISTANCE_TABLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'distance_tables.bin')
+
+# (rows, cols) dimensions of the empty boards whose distance tables are written by default
+DEFAULT_TABLE_SIZES = ((8, 8), (10, 10), (16, 16), (32, 32))
+
+# the distance tables file starts with a header holding its magic bytes and number of tables, followed by an
+# entry per table holding the name of its piece, number of rows and columns and offset within the file, followed
+# by the tables: a byte per (start square, end square) pair, at start * rows * cols + end within its table
+TABLES_MAGIC = b'CHD2'
+TABLES_HEADER = struct.Struct('<4sI')
+TABLE_NAME_SIZE = 16
+TABLE_ENTRY = struct.Struct('<{}sIIQ'.format(TABLE_NAME_SIZE))
+
+# byte of the pairs of locations that can't be reached from one another in a distance table,
+# tables being limited to boards on which every distance fits in the bytes below it
+TABLE_UNREACHABLE = 255
+
+# memory mapped distance tables file and mapping from (piece, rows, cols) to the offset of their table,
+# None until the file is first needed
+__distance_tables_file = None
+__distance_tables = None
+
+
+def write_distance_tables(path=DISTANCE_TABLES_PATH, sizes=DEFAULT_TABLE_SIZES):
+    """
+    Precomputes the minimum number of moves between every pair of locations of empty boards of the given
+    dimensions for every supported piece, and writes them to a distance tables file. The file is written
+    under a temporary name then renamed, so processes mapping the previous file keep reading it unchanged.
+    Tables are looked up by the name of their piece, so the pieces registered with register_piece must be
+    registered the same way by the processes reading the file.
+
+    :param path: the path of the file to write
+    :param sizes: the (rows, cols) dimensions of the empty boards
+    :return: the list of (piece, rows, cols) of the tables written
+    """
+    keys = [(piece, num_rows, num_cols) for num_rows, num_cols in sizes for piece in sorted(SUPPORTED_PIECES)]
+    for piece in SUPPORTED_PIECES:
+        if len(piece.encode()) > TABLE_NAME_SIZE:
+            raise ValueError('piece name too long for a distance table: {!r}'.format(piece))
+    offsets = [TABLES_HEADER.size + TABLE_ENTRY.size * len(keys)]
+    for piece, num_rows, num_cols in keys:
+        offsets.append(offsets[-1] + (num_rows * num_cols) ** 2)
+
+    temp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temp_path, 'wb') as tables_file:
+        tables_file.write(TABLES_HEADER.pack(TABLES_MAGIC, len(keys)))
+        for (piece, num_rows, num_cols), offset in zip(keys, offsets):
+            tables_file.write(TABLE_ENTRY.pack(piece.encode(), num_rows, num_cols, offset))
+        for piece, num_rows, num_cols in keys:
+            tables_file.write(__distance_table(piece, num_rows, num_cols))
+    os.replace(temp_path, path)
+
+    return keys
+
+
+def load_distance_tables(path=DISTANCE_TABLES_PATH):
+    """
+    Memory maps a distance tables file written by write_distance_tables, replacing any file mapped before.
+    find_min_moves maps DISTANCE_TABLES_PATH on its own the first time it needs it, so this is only required
+    to use another file, or to pick up a file written after the first query. Processes mapping the same file
+    share its pages rather than each holding its own copy of the tables.
+
+    :param path: the path of the file to map
+    :return: the list of (piece, rows, cols) of the tables of the file, empty if the file doesn't exist
+    """
+    global __distance_tables_file, __distance_tables
+    if __distance_tables_file is not None:
+        __distance_tables_file.close()
+    __distance_tables_file = None
+    __distance_tables = dict()
+
+    try:
+        with open(path, 'rb') as tables_file:
+            tables = mmap.mmap(tables_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        # missing or empty file
+        return []
+
+    magic, num_tables = TABLES_HEADER.unpack_from(tables, 0) if len(tables) >= TABLES_HEADER.size else (None, 0)
+    if magic != TABLES_MAGIC:
+        tables.close()
+        raise ValueError('not a distance tables file: {!r}'.format(path))
+
+    for index in range(num_tables):
+        piece, num_rows, num_cols, offset = TABLE_ENTRY.unpack_from(tables, TABLES_HEADER.size + index * TABLE_ENTRY.size)
+        __distance_tables[(piece.rstrip(b'\0').decode(), num_rows, num_cols)] = offset
+    __distance_tables_file = tables
+
+    return list(__distance_tables)
+
+
+def __distance_table(piece, num_rows, num_cols):
+    """
+    Returns the distance table of the given piece on an empty board of the given dimensions, see TABLES_HEADER.
+    """
+    board = Board(num_rows=num_rows, num_cols=num_cols)
+    num_squares = num_rows * num_cols
+    table = bytearray([TABLE_UNREACHABLE]) * (num_squares * num_squares)
+    for start in range(num_squares):
+        distances = DistanceField(board, divmod(start, num_cols), piece).distances()
+        for end, distance in enumerate(distance for row in distances for distance in row):
+            if distance is None:
+                continue
+            if distance >= TABLE_UNREACHABLE:
+                raise ValueError('distances too large for a table on a {}x{} board'.format(num_rows, num_cols))
+            table[start * num_squares + end] = distance
+    return table
+
+
+def __table_min_moves(board, start_loc, end_loc, piece):
+    """
+    Looks up the minimum number of moves between two locations in the distance tables when the only spot
+    of the given Board that may be occupied is the start location. Returns UNREACHABLE when the tables hold
+    no path, or None when they don't hold the board or it has other occupied spots.
+    """
+    if __distance_tables is None:
+        load_distance_tables()
+    offset = __distance_tables.get((piece, board.num_rows, board.num_cols))
+    if offset is None:
+        return None
+
+    cells = board.cells
+    num_cols = board.num_cols
+    start = start_loc[0] * num_cols + start_loc[1]
+    occupied = cells.find(1)
+    if occupied >= 0 and (occupied != start or cells.find(1, start + 1) >= 0):
+        return None
+
+    distance = __distance_tables_file[offset + start * len(cells) + end_loc[0] * num_cols + end_loc[1]]
+    return UNREACHABLE if distance == TABLE_UNREACHABLE else distance
+
+
+# a boards file starts with a header holding its magic bytes, the number of rows and columns shared by its boards
+# and their number, followed by a record per board: its bitboard of occupied spots, in little-endian bytes
+BOARDS_MAGIC = b'CHBD'
+BOARDS_HEADER = struct.Struct('<4sIIQ')
+
+# number of board records read from a boards file at once
+BOARDS_CHUNK_SIZE = 4096
+
+# boards loaded as records packed in a single bytes object, see load_boards
+PackedBoards = namedtuple('PackedBoards', ['num_rows', 'num_cols', 'record_size', 'data'])
+
+
+def write_boards(path, boards):
+    """
+    Writes game boards sharing the same dimensions to a boards file, a fixed size record of packed bits per board,
+    read back by load_boards and iter_boards. Boards are written as they're iterated, so any number of them can be
+    written from a generator.
+
+    :param path: the path of the file to write
+    :param boards: an iterable of Boards or 2D lists of characters representing the game boards
+    :return: the number of boards written
+    """
+    num_boards = 0
+    num_rows = num_cols = None
+    with open(path, 'wb') as boards_file:
+        # the header is written again with the number of boards once they're all written
+        boards_file.write(BOARDS_HEADER.pack(BOARDS_MAGIC, 0, 0, 0))
+        for board in boards:
+            board = __as_board(board)
+            if num_rows is None:
+                num_rows, num_cols = board.num_rows, board.num_cols
+            elif (board.num_rows, board.num_cols) != (num_rows, num_cols):
+                raise ValueError('boards of different dimensions: {}x{} and {}x{}'.format(
+                    num_rows, num_cols, board.num_rows, board.num_cols))
+            boards_file.write(board.to_bytes())
+            num_boards += 1
+        boards_file.seek(0)
+        boards_file.write(BOARDS_HEADER.pack(BOARDS_MAGIC, num_rows or 0, num_cols or 0, num_boards))
+
+    return num_boards
+
+
+def iter_boards(boards_file):
+    """
+    Reads game boards one at a time from a file opened in binary mode: either a boards file written by write_boards,
+    read BOARDS_CHUNK_SIZE records at a time, or a text file holding a board string per line (see Board.from_fen),
+    blank lines being skipped. Memory use doesn't grow with the number of boards.
+
+    :param boards_file: the file to read, opened in binary mode
+    :return: a generator of Boards
+    """
+    head = boards_file.read(len(BOARDS_MAGIC))
+    if head != BOARDS_MAGIC:
+        # the bytes read are the start of a text file, possibly spanning short lines, completed up to a line end
+        if head and not head.endswith(b'\n'):
+            head += boards_file.readline()
+        for line in itertools.chain(head.splitlines(), boards_file):
+            if line.strip():
+                yield Board.from_fen(line.decode())
+        return
+
+    num_rows, num_cols, num_boards = __read_boards_header(boards_file)
+    record_size = (num_rows * num_cols + 7) // 8
+    while num_boards:
+        chunk_size = min(num_boards, BOARDS_CHUNK_SIZE)
+        data = __read_records(boards_file, record_size * chunk_size)
+        for index in range(chunk_size):
+            yield Board.from_bytes(data[index * record_size:(index + 1) * record_size], num_rows, num_cols)
+        num_boards -= chunk_size
+
+
+def load_boards(path, packed=False):
+    """
+    Loads all the game boards of a boards file written by write_boards, or of a text file holding a board string
+    per line, see iter_boards.
+
+    :param path: the path of the file to read
+    :param packed: True to load the boards as a PackedBoards, holding the dimensions shared by the boards, the size
+     of the record of every board and the records of all the boards in a single bytes object, the record of board i
+     being data[i * record_size:(i + 1) * record_size] as returned by Board.to_bytes, rather than as Boards
+    :return: a list of Boards, or a PackedBoards if packed is True
+    """
+    with open(path, 'rb') as boards_file:
+        if not packed:
+            return list(iter_boards(boards_file))
+
+        if boards_file.read(len(BOARDS_MAGIC)) == BOARDS_MAGIC:
+            # the records of a boards file are already packed
+            num_rows, num_cols, num_boards = __read_boards_header(boards_file)
+            record_size = (num_rows * num_cols + 7) // 8
+            return PackedBoards(num_rows, num_cols, record_size, __read_records(boards_file, record_size * num_boards))
+
+        boards_file.seek(0)
+        records = []
+        num_rows = num_cols = None
+        for board in iter_boards(boards_file):
+            if num_rows is None:
+                num_rows, num_cols = board.num_rows, board.num_cols
+            elif (board.num_rows, board.num_cols) != (num_rows, num_cols):
+                raise ValueError('boards of different dimensions: {}x{} and {}x{}'.format(
+                    num_rows, num_cols, board.num_rows, board.num_cols))
+            records.append(board.to_bytes())
+        num_rows, num_cols = num_rows or 0, num_cols or 0
+        return PackedBoards(num_rows, num_cols, (num_rows * num_cols + 7) // 8, b''.join(records))
+
+
+def __read_boards_header(boards_file):
+    """
+    Returns the number of rows, number of columns and number of boards of the header of a boards file,
+    read past its magic bytes.
+    """
+    header = BOARDS_MAGIC + boards_file.read(BOARDS_HEADER.size - len(BOARDS_MAGIC))
+    if len(header) < BOARDS_HEADER.size:
+        raise ValueError('truncated boards file header')
+    magic, num_rows, num_cols, num_boards = BOARDS_HEADER.unpack(header)
+    return num_rows, num_cols, num_boards
+
+
+def __read_records(boards_file, num_bytes):
+    """
+    Reads the given number of bytes of board records from a boards file.
+    """
+    data = boards_file.read(num_bytes)
+    if len(data) < num_bytes:
+        raise ValueError('truncated boards file: {} bytes of records missing'.format(num_bytes - len(data)))
+    return data
+
+
+def __unpack_query(query, piece):
+    """
+    Returns the start location, end location and lowercase piece of a batch query.
+    """
+    if len(query) > 2:
+        piece = query[2]
+    return tuple(query[0]), tuple(query[1]), piece.lower()
+
+
+def __search_batch(board, queries):
+    """
+    Finds the shortest paths of the given (index, start location, end location, piece) queries on the
+    given Board, running one search per start location and piece which stops once all the end locations
+    of its queries are reached. Yields an (index, path) tuple for every query, path being None if there's none.
+    """
+    # group the queries by start location and piece
+    groups = dict()
+    for index, start_loc, end_loc, piece in queries:
+        groups.setdefault((start_loc, piece), []).append((index, end_loc))
+
+    num_cols = board.num_cols
+    for (start_loc, piece), group in groups.items():
+        targets = {end_loc[0] * num_cols + end_loc[1] for index, end_loc in group}
+
+        square_to_parent = __breadth_first_search(board, [start_loc], targets, piece)
+
+        for index, end_loc in group:
+            if square_to_parent[end_loc[0] * num_cols + end_loc[1]] >= 0:
+                path = __backtrace(square_to_parent, start_loc, end_loc, num_cols)
+                yield index, [divmod(square, num_cols) for square in path]
+            else:
+                yield index, None
+
+
+def __is_possible_query(board, start_loc, end_loc, piece):
+    """
+    Determines if a path could exist between the given start and end locations on the given Board: the piece
+    is supported, both locations lie within the game board, the end location is free, and for a bishop,
+    they're on the same color.
+    """
+    if piece.lower() not in SUPPORTED_PIECES or \
+            not board.is_within(start_loc) or \
+            not board.is_within(end_loc) or \
+            board.is_occupied(end_loc):
+        return False
+    return piece.lower() != BISHOP or is_on_same_color(start_loc, end_loc, board)
+
+
+def __is_connected(board, start_loc, end_loc, piece):
+    """
+    Determines if the given start and end locations of a possible query (see __is_possible_query) could be
+    connected on the given Board: False only when the connected components of the board are labelled for
+    the piece and the end location lies in none of the components the piece can reach.
+    """
+    labels = board.components.get(piece.lower())
+    if labels is None:
+        return True
+    num_cols = board.num_cols
+    start = start_loc[0] * num_cols + start_loc[1]
+    end_label = labels[end_loc[0] * num_cols + end_loc[1]]
+    if not board.cells[start]:
+        return labels[start] == end_label
+    # the piece leaves an occupied start location for any of the components it has a move into
+    gen_steps = __geometry(board.num_rows, num_cols).step_generators[piece.lower()]
+    return any(labels[square] == end_label for square in gen_steps(board.cells, start))
+
+
+def __component_labels(board, piece):
+    """
+    Returns the array of the label of the connected component of every square of the given Board for the given
+    lowercase piece, -1 for the occupied squares, labelling the components the first time they're needed.
+    """
+    labels = board.components.get(piece)
+    if labels is not None:
+        return labels
+
+    gen_steps = __geometry(board.num_rows, board.num_cols).step_generators[piece]
+    cells = board.cells
+    labels = array('i', [-1]) * len(cells)
+    label = 0
+
+    # flood every component from its first free square not labelled yet
+    for square in range(len(cells)):
+        if cells[square] or labels[square] >= 0:
+            continue
+        labels[square] = label
+        frontier = [square]
+        while frontier:
+            next_frontier = []
+            for cur_square in frontier:
+                for next_square in gen_steps(cells, cur_square):
+                    if labels[next_square] < 0:
+                        labels[next_square] = label
+                        next_frontier.append(next_square)
+            frontier = next_frontier
+        label += 1
+
+    board.components[piece] = labels
+    return labels
+
+
+def __min_moves(board, start_loc, end_loc, piece, search, stats, keeps_components):
+    """
+    Finds the minimum number of moves between two distinct locations of a possible query (see __is_possible_query)
+    on the given Board for the given lowercase piece, labelling the connected components of the board when there's
+    no path and keeps_components is True, see find_min_moves.
+    """
+    # read the answer of an empty board from the distance tables
+    min_moves = __table_min_moves(board, start_loc, end_loc, piece)
+    if min_moves is not None:
+        return None if min_moves == UNREACHABLE else min_moves
+
+    # answer in constant time when no chess piece on the board can be in the way
+    min_moves = __closed_form_min_moves(board, start_loc, end_loc, piece)
+    if min_moves is not None:
+        return min_moves
+
+    if not __is_connected(board, start_loc, end_loc, piece):
+        return None
+
+    # without a cache to fill in, the distance is the level at which the search reaches
+    # the end location, with no path to build
+    if search is None and __path_cache is None:
+        min_moves = __level_search(board, start_loc, end_loc, piece, stats)
+        if min_moves is None and keeps_components:
+            __component_labels(board, piece)
+        return min_moves
+
+    path = find_shortest_path(board, start_loc, end_loc, piece, search, stats)
+
+    if path is None:
+        return None
+
+    return len(path) - 1
+
+
+def __closed_form_min_moves(board, start_loc, end_loc, piece):
+    """
+    Returns the minimum number of moves between two distinct locations when it is known in closed form
+    because none of the chess pieces on the game board can be in the way, or None if a search is required.
+    The end location is expected to be free, and on the same color as the start location for a bishop.
+    """
+    row_diff = abs(start_loc[0] - end_loc[0])
+    col_diff = abs(start_loc[1] - end_loc[1])
+
+    if piece == KING:
+        # moving diagonally, then straight, takes the Chebyshev distance and stays within
+        # the rectangle spanned by the two locations
+        if __is_clear_rectangle(board, start_loc, end_loc):
+            return max(row_diff, col_diff)
+    elif piece == ROOK:
+        if row_diff == 0 or col_diff == 0:
+            if __is_clear_line(board, start_loc, end_loc):
+                return 1
+        # otherwise the only 2-move paths turn on one of the two corners of the spanned rectangle
+        elif __is_clear_turn(board, start_loc, (start_loc[0], end_loc[1]), end_loc) or \
+                __is_clear_turn(board, start_loc, (end_loc[0], start_loc[1]), end_loc):
+            return 2
+    elif piece == BISHOP:
+        if row_diff == col_diff:
+            if __is_clear_line(board, start_loc, end_loc):
+                return 1
+        else:
+            # the only 2-move paths turn where a diagonal of the start location crosses one of the end location
+            start_diff = start_loc[0] - start_loc[1]
+            start_sum = start_loc[0] + start_loc[1]
+            end_diff = end_loc[0] - end_loc[1]
+            end_sum = end_loc[0] + end_loc[1]
+            for turn_loc in (((start_diff + end_sum) // 2, (end_sum - start_diff) // 2),
+                             ((end_diff + start_sum) // 2, (start_sum - end_diff) // 2)):
+                if board.is_within(turn_loc) and __is_clear_turn(board, start_loc, turn_loc, end_loc):
+                    return 2
+    elif piece == KNIGHT:
+        # a knight jumps over other pieces, but any of them could occupy a spot the shortest paths land on,
+        # and on boards narrower than 5 spots the edges cut off more of the shortest paths than the formula knows
+        if min(board.num_rows, board.num_cols) >= 5 and board.cells.find(1) < 0:
+            return __knight_distance(start_loc, end_loc, board.num_rows, board.num_cols)
 
     return None
 
-def __backtrace(locToParent, start_loc, end_loc):
+
+def __is_clear_rectangle(board, first_loc, second_loc):
+    """
+    Determines if no location within the rectangle having the two given locations as corners is occupied.
+    """
+    cells = board.cells
+    first_col = min(first_loc[1], second_loc[1])
+    last_col = max(first_loc[1], second_loc[1])
+    for row in range(min(first_loc[0], second_loc[0]), max(first_loc[0], second_loc[0]) + 1):
+        if cells.find(1, row * board.num_cols + first_col, row * board.num_cols + last_col + 1) >= 0:
+            return False
+    return True
+
+
+def __is_clear_line(board, first_loc, second_loc):
+    """
+    Determines if no location strictly between the two given locations, lying on a common
+    row, column or diagonal, is occupied.
+    """
+    add_to_row = (second_loc[0] > first_loc[0]) - (second_loc[0] < first_loc[0])
+    add_to_col = (second_loc[1] > first_loc[1]) - (second_loc[1] < first_loc[1])
+    shift = add_to_row * board.num_cols + add_to_col
+    first = first_loc[0] * board.num_cols + first_loc[1]
+    second = second_loc[0] * board.num_cols + second_loc[1]
+    # the spots strictly between the locations form a slice of the spots of the board, walked from the lowest square
+    if shift < 0:
+        first, second, shift = second, first, -shift
+    return board.cells.find(1, first + 1, second) < 0 if shift == 1 else \
+        1 not in board.cells[first + shift:second:shift]
+
+
+def __is_clear_turn(board, start_loc, turn_loc, end_loc):
+    """
+    Determines if a slider can move from the start location to the end location with a single stop at the
+    turn location, lying on a common line with both of them.
+    """
+    return not board.is_occupied(turn_loc) and \
+        __is_clear_line(board, start_loc, turn_loc) and \
+        __is_clear_line(board, turn_loc, end_loc)
+
+
+def __knight_distance(start_loc, end_loc, num_rows, num_cols):
+    """
+    Returns the minimum number of moves of a knight between two distinct locations on an empty game board
+    of the given dimensions, at least 5 spots wide and high.
+    """
+    long_diff = max(abs(start_loc[0] - end_loc[0]), abs(start_loc[1] - end_loc[1]))
+    short_diff = min(abs(start_loc[0] - end_loc[0]), abs(start_loc[1] - end_loc[1]))
+
+    # special cases where the knight has to detour, the board edges cutting off the shorter
+    # way around when one of the locations lies in a corner
+    if (long_diff, short_diff) == (1, 0):
+        return 3
+    if (long_diff, short_diff) == (2, 2):
+        return 4
+    corners = {(0, 0), (0, num_cols - 1), (num_rows - 1, 0), (num_rows - 1, num_cols - 1)}
+    if (long_diff, short_diff) == (1, 1) and (tuple(start_loc) in corners or tuple(end_loc) in corners):
+        return 4
+
+    delta = long_diff - short_diff
+    if short_diff > delta:
+        return delta - 2 * ((delta - short_diff) // 3)
+    return delta - 2 * ((delta - short_diff) // 4)
+
+
+def __as_board(board):
+    """
+    Returns the given game board as a Board, converting it once if it's a 2D list of characters so
+    that the search doesn't compare characters on every expanded node.
+    """
+    if isinstance(board, Board):
+        return board
+    return Board.from_grid(board)
+
+
+def __breadth_first_search(board, start_locs, targets, piece, stats=None, nearest=False):
+    """
+    # Performs a BFS from the given start locations at once constrained by the possible moves of the given
+    piece on the given game board, until every square of the given set of target squares has been
+    reached, or the first one if nearest is set, or no more squares can be when targets is None.
+    Returns the array of the parent square of every square, -1 for the squares not reached.
+    """
+    gen_moves = __geometry(board.num_rows, board.num_cols).move_generators[piece.lower()]
+    cells = board.cells
+    if stats is not None:
+        gen_moves = __instrumented_move_generator(gen_moves, stats, len(cells))
+        started = (time.perf_counter(), stats.movegen_seconds)
+
+    # fringe nodes of the BFS at the current level (distance from the closest start location), as square indices
+    frontier = []
+
+    # locations already seen during traversal to avoid cycles during search, a byte of 1 per seen square
+    seen = bytearray(len(cells))
+
+    # square every board square came from during search, -1 for the squares not reached, the start squares
+    # being their own parents, ex: 1 -> 0 when performing search starting at location (0,0)
+    square_to_parent = array('i', [-1]) * len(cells)
+
+    for start_loc in start_locs:
+        start = start_loc[0] * board.num_cols + start_loc[1]
+        if not seen[start]:
+            seen[start] = 1
+            square_to_parent[start] = start
+            frontier.append(start)
+
+    # number of target squares not seen yet, never reaching 0 without targets
+    remaining = (1 if nearest else len(targets)) if targets else -1
+    targets = targets or ()
+    nodes_expanded = 0
+    frontier_peak = len(frontier)
+
+    # perform BFS one level at a time, collecting the fringe nodes of the next level,
+    # until all target locations are seen
+    while frontier and remaining:
+        next_frontier = []
+        for cur_square in frontier:
+            nodes_expanded += 1
+            for square in gen_moves(cells, cur_square):
+                # note the location each new move came from and add it to the fringe of the next level
+                if not seen[square]:
+                    seen[square] = 1
+                    square_to_parent[square] = cur_square
+                    next_frontier.append(square)
+                    if square in targets:
+                        remaining -= 1
+                        if not remaining:
+                            break
+            if not remaining:
+                break
+        frontier = next_frontier
+        frontier_peak = max(frontier_peak, len(frontier))
+
+    if stats is not None:
+        __record_search(stats, BFS, nodes_expanded, frontier_peak, started)
+
+    return square_to_parent
+
+
+def __layered_search(board, start_loc, end_loc, piece):
+    """
+    Performs a BFS from given start location constrained by the possible moves of the given piece on the given
+    game board, one level at a time until the level reaching the end location, the number of shortest paths to
+    a square being the sum of the numbers of shortest paths to the squares of the previous level it's reached from.
+    Returns the mapping of the squares seen to their level and the number of shortest paths to the end location.
+    """
+    gen_moves = __geometry(board.num_rows, board.num_cols).move_generators[piece.lower()]
+    cells = board.cells
+    start = start_loc[0] * board.num_cols + start_loc[1]
+    end = end_loc[0] * board.num_cols + end_loc[1]
+
+    square_to_level = {start: 0}
+    # number of shortest paths to every square of the current level
+    square_to_paths = {start: 1}
+    level = 0
+
+    while square_to_paths and end not in square_to_level:
+        level += 1
+        next_square_to_paths = dict()
+        for cur_square, num_paths in square_to_paths.items():
+            for square in gen_moves(cells, cur_square):
+                if square not in square_to_level:
+                    next_square_to_paths[square] = next_square_to_paths.get(square, 0) + num_paths
+        for square in next_square_to_paths:
+            square_to_level[square] = level
+        square_to_paths = next_square_to_paths
+
+    return square_to_level, square_to_paths.get(end, 0)
+
+
+def __generate_paths(board, start_loc, end_loc, piece, square_to_level):
+    """
+    Generates the shortest paths from given start to end location, depth first from the end location
+    through the squares one level closer to the start location, given the levels of the squares seen by
+    __layered_search.
+    """
+    gen_moves = __geometry(board.num_rows, board.num_cols).move_generators[piece.lower()]
+    num_cols = board.num_cols
+    start = start_loc[0] * num_cols + start_loc[1]
+    end = end_loc[0] * num_cols + end_loc[1]
+    # every piece moves the same way forward and backward between free locations, the start location being left free
+    cells = board.cells
+    if cells[start]:
+        cells = bytearray(cells)
+        cells[start] = 0
+
+    # squares one level closer to the start location that every square is reached from
+    square_to_previous = dict()
+
+    def previous_squares(cur_square):
+        if cur_square not in square_to_previous:
+            previous_level = square_to_level[cur_square] - 1
+            square_to_previous[cur_square] = [square for square in gen_moves(cells, cur_square)
+                                              if square_to_level.get(square, -1) == previous_level]
+        return square_to_previous[cur_square]
+
+    # path back from the end square, along with an iterator over the squares left to try after every square
+    path = [end]
+    untried = [iter(previous_squares(end))]
+    while untried:
+        square = next(untried[-1], None)
+        if square is None:
+            untried.pop()
+            path.pop()
+        elif square == start:
+            yield [divmod(path_square, num_cols) for path_square in reversed(path + [start])]
+        else:
+            path.append(square)
+            untried.append(iter(previous_squares(square)))
+
+
+def __level_search(board, start_loc, end_loc, piece, stats=None):
+    """
+    Performs a BFS from given start to end location constrained by the possible moves of the given piece on
+    the given game board, holding each level of the search in a bitboard expanded at once. Returns the number
+    of the level at which the end location is reached, or None if the search fails.
+    """
+    expand_level = __geometry(board.num_rows, board.num_cols).level_expanders[piece.lower()]
+    empty = board.empty
+    end = 1 << (end_loc[0] * board.num_cols + end_loc[1])
+    if stats is not None:
+        expand_level = __instrumented_level_expander(expand_level, stats, len(board.cells))
+        started = (time.perf_counter(), stats.movegen_seconds)
+
+    # bitboards of the locations of the current level and of all locations already seen
+    frontier = seen = 1 << (start_loc[0] * board.num_cols + start_loc[1])
+    level = 0
+    nodes_expanded = 0
+    frontier_peak = 1
+
+    while frontier and not frontier & end:
+        level += 1
+        num_nodes = bin(frontier).count('1')
+        nodes_expanded += num_nodes
+        frontier_peak = max(frontier_peak, num_nodes)
+        frontier = expand_level(frontier, empty) & ~seen
+        seen |= frontier
+
+    if stats is not None:
+        __record_search(stats, LEVEL_BFS, nodes_expanded, frontier_peak, started)
+
+    return level if frontier else None
+
+
+def __bidirectional_search(board, start_loc, end_loc, piece, stats=None):
+    """
+    Performs a BFS from both the given start and end locations, constrained by the possible moves
+    of the given piece on the given game board, until the two searches meet. Returns a shortest path
+    between the two locations as a list of square indices, or None if the search fails.
+
+    Every piece moves the same way forward and backward: a move between two locations is possible in
+    both directions as long as they're both free. The piece leaves its start location free, so
+    the backward search can move onto the start location even if the board marks it as occupied.
+    """
+    gen_moves = __geometry(board.num_rows, board.num_cols).move_generators[piece.lower()]
+    num_cols = board.num_cols
+    start = start_loc[0] * num_cols + start_loc[1]
+    end = end_loc[0] * num_cols + end_loc[1]
+    cells = board.cells
+    if cells[start]:
+        cells = bytearray(cells)
+        cells[start] = 0
+    if stats is not None:
+        gen_moves = __instrumented_move_generator(gen_moves, stats, len(cells))
+        started = (time.perf_counter(), stats.movegen_seconds)
+
+    # frontier and mapping of squares to their parent square of the forward (0) and backward (1) searches,
+    # the backward search mapping squares to the next square toward the end location, and the search
+    # which has seen every square: 1 for the forward search, 2 for the backward one, 0 for neither
+    frontiers = [[start], [end]]
+    square_to_parent = [array('i', [-1]) * len(cells), array('i', [-1]) * len(cells)]
+    seen = bytearray(len(cells))
+    seen[start] = 1
+    seen[end] = 2
+
+    nodes_expanded = 0
+    frontier_peak = 2
+    meeting = None
+
+    # expand the level of the search with the smaller frontier, until a move of one search reaches
+    # a location seen by the other: that location lies on a shortest path
+    while frontiers[0] and frontiers[1] and meeting is None:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        side_mark = side + 1
+        side_parents = square_to_parent[side]
+
+        next_frontier = []
+        for cur_square in frontiers[side]:
+            nodes_expanded += 1
+            for square in gen_moves(cells, cur_square):
+                if seen[square] != side_mark:
+                    side_parents[square] = cur_square
+                    if seen[square]:
+                        meeting = square
+                        break
+                    seen[square] = side_mark
+                    next_frontier.append(square)
+            if meeting is not None:
+                break
+
+        frontiers[side] = next_frontier
+        frontier_peak = max(frontier_peak, len(frontiers[0]) + len(frontiers[1]))
+
+    if stats is not None:
+        __record_search(stats, BIDIRECTIONAL, nodes_expanded, frontier_peak, started)
+
+    if meeting is None:
+        return None
+
+    # join the path from the start to the meeting location with the path from there to the end
+    path = __backtrace(square_to_parent[0], start_loc, divmod(meeting, num_cols), num_cols)
+    cur_square = meeting
+    while cur_square != end:
+        cur_square = square_to_parent[1][cur_square]
+        path.append(cur_square)
+
+    return path
+
+
+def __king_moves_bound(row_diff, col_diff):
+    """
+    Returns a lower bound on the number of moves of a king over the given differences of row and column.
+    """
+    return max(row_diff, col_diff)
+
+
+def __rook_moves_bound(row_diff, col_diff):
+    """
+    Returns a lower bound on the number of moves of a rook over the given differences of row and column.
+    """
+    if not row_diff and not col_diff:
+        return 0
+    return 1 if not row_diff or not col_diff else 2
+
+
+def __bishop_moves_bound(row_diff, col_diff):
+    """
+    Returns a lower bound on the number of moves of a bishop over the given differences of row and column,
+    between two locations on the same color.
+    """
+    if not row_diff and not col_diff:
+        return 0
+    return 1 if row_diff == col_diff else 2
+
+
+def __knight_moves_bound(row_diff, col_diff):
+    """
+    Returns a lower bound on the number of moves of a knight over the given differences of row and column.
+    """
+    # a move changes the row and the column by at most 2, and both by at most 3 together
+    bound = max((row_diff + 1) // 2, (col_diff + 1) // 2, (row_diff + col_diff + 2) // 3)
+    # every move changes the color of the knight, so the number of moves has the parity of the sum of the differences
+    return bound + (bound + row_diff + col_diff) % 2
+
+
+def __spec_moves_bound(spec):
+    """
+    Returns a lower bound on the number of moves of a piece defined by the given PieceSpec over differences
+    of row and column: a move changes the row and the column by at most the reach of the piece, so reaching
+    a location takes at least the larger difference divided by that reach.
+    """
+    reach = max(max(abs(add_to_row), abs(add_to_col)) for add_to_row, add_to_col in spec.leaps + spec.rides)
+    if spec.rides and spec.max_range is None:
+        def moves_bound(row_diff, col_diff):
+            return 1 if row_diff or col_diff else 0
+        return moves_bound
+    if spec.rides:
+        reach *= spec.max_range
+
+    def moves_bound(row_diff, col_diff):
+        return -(-max(row_diff, col_diff) // reach)
+    return moves_bound
+
+
+# admissible heuristics of the supported pieces, mapping the differences of row and column between a location and the
+# end location to a lower bound on the number of moves between them. No bound decreases by more than 1 with a move,
+# so no location is expanded twice by A*.
+__MOVES_BOUNDS = {
+    KING: __king_moves_bound,
+    ROOK: __rook_moves_bound,
+    BISHOP: __bishop_moves_bound,
+    KNIGHT: __knight_moves_bound,
+}
+
+
+def __astar_search(board, start_loc, end_loc, piece, stats=None):
+    """
+    Performs an A* search from given start to end location constrained by the possible moves of the given piece
+    on the given game board, expanding first the locations with the lowest sum of the number of moves from the
+    start location and the lower bound of the piece on the number of moves left. Returns a shortest path
+    between the two locations as a list of square indices, or None if the search fails.
+    """
+    gen_moves = __geometry(board.num_rows, board.num_cols).move_generators[piece.lower()]
+    moves_bound = __MOVES_BOUNDS[piece.lower()]
+    cells = board.cells
+    num_cols = board.num_cols
+    start = start_loc[0] * num_cols + start_loc[1]
+    end = end_loc[0] * num_cols + end_loc[1]
+    if stats is not None:
+        gen_moves = __instrumented_move_generator(gen_moves, stats, len(cells))
+        started = (time.perf_counter(), stats.movegen_seconds)
+
+    # fringe nodes of the search as (bound on the length of a path through the node, bound on the number of moves
+    # left, square) tuples, so that ties are broken toward the nodes closest to the end location
+    bound = moves_bound(abs(start_loc[0] - end_loc[0]), abs(start_loc[1] - end_loc[1]))
+    fringe = [(bound, bound, start)]
+
+    # number of moves of the shortest known path to every square, the number of squares (longer than any path)
+    # for the squares not seen yet, and the square it came from along that path
+    square_to_moves = array('i', [len(cells)]) * len(cells)
+    square_to_moves[start] = 0
+    square_to_parent = array('i', [-1]) * len(cells)
+
+    nodes_expanded = 0
+    frontier_peak = 1
+    found = False
+
+    while fringe:
+        path_bound, moves_left, cur_square = heapq.heappop(fringe)
+        moves = path_bound - moves_left
+        if moves > square_to_moves[cur_square]:
+            # a shorter path to the square was found after this one was added to the fringe
+            continue
+        if cur_square == end:
+            found = True
+            break
+
+        nodes_expanded += 1
+        for square in gen_moves(cells, cur_square):
+            if moves + 1 < square_to_moves[square]:
+                square_to_moves[square] = moves + 1
+                square_to_parent[square] = cur_square
+                row, col = divmod(square, num_cols)
+                moves_left = moves_bound(abs(row - end_loc[0]), abs(col - end_loc[1]))
+                heapq.heappush(fringe, (moves + 1 + moves_left, moves_left, square))
+        if stats is not None:
+            frontier_peak = max(frontier_peak, len(fringe))
+
+    if stats is not None:
+        __record_search(stats, ASTAR, nodes_expanded, frontier_peak, started)
+
+    if not found:
+        return None
+
+    return __backtrace(square_to_parent, start_loc, end_loc, num_cols)
+
+
+def __instrumented_move_generator(gen_moves, stats, num_squares):
     """
-    Given the starting and end locations and a mapping of explored nodes to
-    parents nodes obtained during search, returns the path from start to end.
+    Returns a move generator recording into the given SearchStats the moves generated by the given move generator,
+    the moves it would generate on an empty board that occupied spots block, and the time it takes. Only searches
+    given a SearchStats generate moves through it, so the others don't pay for the instrumentation.
+    """
+    empty_cells = bytearray(num_squares)
+    perf_counter = time.perf_counter
+
+    def gen_instrumented_moves(cells, square):
+        start_time = perf_counter()
+        moves = gen_moves(cells, square)
+        end_time = perf_counter()
+        stats.movegen_seconds += end_time - start_time
+        stats.moves_generated += len(moves)
+        stats.moves_rejected += len(gen_moves(empty_cells, square)) - len(moves)
+        # the time spent counting the rejected moves isn't part of the search
+        stats.bookkeeping_seconds -= perf_counter() - end_time
+        return moves
+    return gen_instrumented_moves
+
+
+def __instrumented_level_expander(expand_level, stats, num_squares):
+    """
+    Returns a level expander recording into the given SearchStats the locations reached by the given level expander,
+    the locations it would reach on an empty board that occupied spots block, and the time it takes.
+    """
+    full = (1 << num_squares) - 1
+    perf_counter = time.perf_counter
+
+    def expand_instrumented_level(frontier, empty):
+        start_time = perf_counter()
+        reached = expand_level(frontier, empty)
+        end_time = perf_counter()
+        stats.movegen_seconds += end_time - start_time
+        stats.moves_generated += bin(reached).count('1')
+        stats.moves_rejected += bin(expand_level(frontier, full) & ~reached).count('1')
+        stats.bookkeeping_seconds -= perf_counter() - end_time
+        return reached
+    return expand_instrumented_level
+
+
+def __record_search(stats, search, nodes_expanded, frontier_peak, started):
+    """
+    Records the search run into the given SearchStats, given the time the search started at
+    and the time spent generating moves by then.
+    """
+    stats.search = search
+    stats.nodes_expanded += nodes_expanded
+    stats.frontier_peak = max(stats.frontier_peak, frontier_peak)
+    __record_bookkeeping(stats, started)
+
+
+def __record_bookkeeping(stats, started):
+    """
+    Records into the given SearchStats the time elapsed since the given start time that wasn't spent generating moves,
+    given the time spent generating moves by the start time.
+    """
+    start_time, movegen_seconds = started
+    stats.bookkeeping_seconds += time.perf_counter() - start_time - (stats.movegen_seconds - movegen_seconds)
+
+
+def __backtrace(square_to_parent, start_loc, end_loc, num_cols):
+    """
+    Given the starting and end locations and the parent square of every square explored
+    during search, returns the path from start to end as a list of square indices.
     """
     path = []
-    cur_loc = end_loc
+    start = start_loc[0] * num_cols + start_loc[1]
+    cur_square = end_loc[0] * num_cols + end_loc[1]
 
     # start from end location and continue looking up its parent location
     # until a path from end to start is constructed
-    while cur_loc != start_loc:
-        path.append(cur_loc)
-        cur_loc = locToParent[cur_loc]
+    while cur_square != start:
+        path.append(cur_square)
+        cur_square = square_to_parent[cur_square]
 
-    path.append(cur_loc)
+    path.append(start)
     path.reverse()
 
     return path
 
+
+def __compact_path(board, path):
+    """
+    Returns the given path of square indices of the given Board as a compact array.
+    """
+    return array('H' if len(board.cells) <= 1 << 16 else 'I', path)
@@ -3,10 +3,17 @@ Library to assist chess player by finding the minimum number of moves for a give
 piece from a given
 
 """
+import argparse
+import json
+import sys
+
 from chess import find_min_moves
 import chess
+import runner
+import streaming
+
 
-def main():
+def run_examples():
 
     # Example 1 - King Min Moves
     chess_piece = chess.KING
@@ -58,5 +65,80 @@ def main():
           format(chess_piece, start_location, end_location, len(path) - 1))
         print("One possible shortest path:", path)
 
+
+
+def run_query_file(args):
+    """
+    Answers the queries of a JSON file holding a list of "boards", each a list of occupied [row, col] spots,
+    and a list of "queries", each a [board index, [start row, start col], [end row, end col], piece] list,
+    over a pool of worker processes. Prints the result of every query as a JSON line, in order.
+    """
+    with open(args.file) as query_file:
+        query_set = json.load(query_file)
+
+    boards = [chess.Board(tuple(spot) for spot in spots) for spots in query_set['boards']]
+    queries = [(index, tuple(start_location), tuple(end_location), chess_piece)
+               for index, start_location, end_location, chess_piece in query_set['queries']]
+
+    results = runner.run_queries(boards, queries, workers=args.workers, chunk_size=args.chunk_size,
+                                 paths=args.paths)
+    for result in results:
+        print(json.dumps(result))
+
+
+def stream_query_lines(args):
+    """
+    Answers the queries read line by line from a file, or stdin, printing every result line as soon as it's answered.
+    """
+    if args.file == '-':
+        streaming.stream_queries(sys.stdin, sys.stdout, args.format, args.paths)
+    else:
+        with open(args.file, newline='') as query_file:
+            streaming.stream_queries(query_file, sys.stdout, args.format, args.paths)
+
+
+def precompute_tables(args):
+    """
+    Writes the distance tables of empty boards of the given sizes, printing the tables written.
+    """
+    sizes = [tuple(int(dimension) for dimension in size.split('x')) for size in args.sizes.split(',')]
+    for piece, num_rows, num_cols in chess.write_distance_tables(args.output, sizes):
+        print('{} {}x{}'.format(piece, num_rows, num_cols))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find the minimum number of moves of chess pieces.')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('examples', help='run the examples (default)')
+
+    run_parser = subparsers.add_parser('run', help='answer a JSON file of queries over worker processes')
+    run_parser.add_argument('file', help='JSON file with "boards" and "queries" lists')
+    run_parser.add_argument('--workers', type=int, default=None, help='number of worker processes')
+    run_parser.add_argument('--chunk-size', type=int, default=runner.DEFAULT_CHUNK_SIZE,
+                            help='number of queries sent to a worker process at once')
+    run_parser.add_argument('--paths', action='store_true', help='find shortest paths instead of min moves')
+
+    stream_parser = subparsers.add_parser('stream', help='answer queries line by line, printing results as they come')
+    stream_parser.add_argument('file', nargs='?', default='-', help='file of queries, stdin if omitted or "-"')
+    stream_parser.add_argument('--format', choices=sorted(streaming.SUPPORTED_FORMATS), default=streaming.JSONL,
+                               help='format of the queries and results')
+    stream_parser.add_argument('--paths', action='store_true', help='find shortest paths instead of min moves')
+
+    precompute_parser = subparsers.add_parser('precompute', help='write the distance tables of empty boards')
+    precompute_parser.add_argument('--sizes', default=','.join('{}x{}'.format(*size) for size in chess.DEFAULT_TABLE_SIZES),
+                                   help='comma separated board dimensions, e.g. 8x8,16x16')
+    precompute_parser.add_argument('--output', default=chess.DISTANCE_TABLES_PATH, help='file to write the tables to')
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        run_query_file(args)
+    elif args.command == 'stream':
+        stream_query_lines(args)
+    elif args.command == 'precompute':
+        precompute_tables(args)
+    else:
+        run_examples()
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,117 @@
+"""
+Runs large sets of chess queries over a pool of worker processes. The occupied spots of all the game
+boards are placed once in shared memory, so every task ships only the index of its board along with
+the queries, and every worker process reads a board from shared memory the first time it needs it.
+
+Shared memory starts with a header per board, holding the offset of its bitboard of occupied spots
+within shared memory along with its number of rows and columns, followed by the bitboards of all boards.
+
+"""
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import chess
+
+# number of queries sent to a worker process at once
+DEFAULT_CHUNK_SIZE = 1024
+
+# header of a board in shared memory: offset of its bitboard, number of rows, number of columns
+BOARD_HEADER = struct.Struct('<QII')
+
+# shared memory holding the boards, attached once by every worker process,
+# and the boards already read from it by the worker process, by board index
+__shared_boards = None
+__boards = dict()
+
+
+def run_queries(boards, queries, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, paths=False):
+    """
+    Answers queries for the minimum number of moves, or shortest paths, over a pool of worker processes.
+    Queries on the same board within a chunk are answered through find_min_moves_batch or
+    find_shortest_paths_batch, sharing one search per start location and piece.
+
+    :param boards: a list of Boards or 2D lists of characters representing the game boards referenced by the queries
+    :param queries: an iterable of (board index, start location, end location, piece) tuples
+    :param workers: the number of worker processes, the number of CPUs if None
+    :param chunk_size: the number of queries sent to a worker process at once
+    :param paths: True to find the shortest path of every query rather than its minimum number of moves
+    :return: a list holding the result of every query, in the order of the queries, as returned by
+     find_min_moves, or find_shortest_path if paths is True
+    """
+    queries = list(queries)
+    if not queries:
+        return []
+
+    boards = [board if isinstance(board, chess.Board) else chess.Board.from_grid(board) for board in boards]
+    offsets = [BOARD_HEADER.size * len(boards)]
+    for board in boards:
+        offsets.append(offsets[-1] + __num_bytes(board))
+
+    shared_boards = shared_memory.SharedMemory(create=True, size=max(offsets[-1], 1))
+    try:
+        for index, board in enumerate(boards):
+            BOARD_HEADER.pack_into(shared_boards.buf, index * BOARD_HEADER.size,
+                                   offsets[index], board.num_rows, board.num_cols)
+            shared_boards.buf[offsets[index]:offsets[index + 1]] = board.occupied.to_bytes(__num_bytes(board), 'little')
+
+        chunks = [queries[index:index + chunk_size] for index in range(0, len(queries), chunk_size)]
+        results = []
+        with ProcessPoolExecutor(workers, initializer=__attach_boards, initargs=(shared_boards.name,)) as executor:
+            # results of the chunks come back in the order the chunks were submitted
+            for chunk_results in executor.map(__run_chunk, chunks, [paths] * len(chunks)):
+                results.extend(chunk_results)
+        return results
+    finally:
+        shared_boards.close()
+        shared_boards.unlink()
+
+
+def __num_bytes(board):
+    """
+    Returns the number of bytes holding the bitboard of occupied spots of the given Board in shared memory.
+    """
+    return (board.num_rows * board.num_cols + 7) // 8
+
+
+def __attach_boards(name):
+    """
+    Attaches the worker process to the shared memory holding the boards.
+    """
+    global __shared_boards
+    __shared_boards = shared_memory.SharedMemory(name=name)
+    __boards.clear()
+
+
+def __read_board(index):
+    """
+    Returns the Board of the given index, reading it from shared memory the first time it's needed.
+    """
+    board = __boards.get(index)
+    if board is None:
+        offset, num_rows, num_cols = BOARD_HEADER.unpack_from(__shared_boards.buf, index * BOARD_HEADER.size)
+        occupied = bytes(__shared_boards.buf[offset:offset + (num_rows * num_cols + 7) // 8])
+        board = chess.Board.from_bitboard(int.from_bytes(occupied, 'little'), num_rows, num_cols)
+        __boards[index] = board
+    return board
+
+
+def __run_chunk(chunk, paths):
+    """
+    Answers a chunk of (board index, start location, end location, piece) queries in a worker process,
+    returning the results in the order of the chunk.
+    """
+    find_batch = chess.find_shortest_paths_batch if paths else chess.find_min_moves_batch
+
+    # group the queries by board, keeping track of their position in the chunk
+    board_queries = dict()
+    for position, (index, start_loc, end_loc, piece) in enumerate(chunk):
+        board_queries.setdefault(index, []).append((position, (start_loc, end_loc, piece)))
+
+    results = [None] * len(chunk)
+    for index, positioned_queries in board_queries.items():
+        batch_results = find_batch(__read_board(index), [query for position, query in positioned_queries], None)
+        for (position, query), result in zip(positioned_queries, batch_results):
+            results[position] = result
+
+    return results
@@ -0,0 +1,312 @@
+"""
+Serves chess queries to local clients from a long-lived process, over TCP or a Unix socket, so the boards
+parsed are shared by every client rather than rebuilt by every service embedding the module. With searches
+run in threads, the default, the connected components labelled on those boards are kept with them too, while
+worker processes get a copy of the board for every search and keep nothing.
+
+Clients send one JSON query per line, in the JSONL format of the streaming module with an optional "paths"
+key set to true to find the shortest path rather than the minimum number of moves, and receive one JSON
+result per line, carrying the "id" of its query since results come back as soon as they're answered.
+Queries arriving within DEFAULT_COALESCE_DELAY of each other for the same board, start location and piece
+are answered by a single batched search, run in an executor so the event loop keeps serving other clients.
+
+Ex: python3 service.py serve --port 8765
+    python3 service.py load --port 8765 --queries 2000 --concurrency 32
+
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import benchmark
+import chess
+import streaming
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# seconds a query waits for other queries on the same board, start location and piece before its search runs
+DEFAULT_COALESCE_DELAY = 0.002
+
+# number of parsed boards kept by the service, the least recently used board being dropped when full
+DEFAULT_BOARD_CACHE_SIZE = 256
+
+# number of connections the load generator sends queries over at once
+DEFAULT_CONCURRENCY = 16
+
+# latency percentiles reported by the load generator
+PERCENTILES = (50, 90, 99)
+
+
+class QueryService:
+    """
+    Answers queries for the minimum number of moves or shortest paths, coalescing the concurrent
+    queries on the same board, start location and piece into a single batched search.
+    """
+
+    def __init__(self, executor=None, coalesce_delay=DEFAULT_COALESCE_DELAY, board_cache_size=DEFAULT_BOARD_CACHE_SIZE):
+        """
+        :param executor: the executor running the searches, the default executor of the event loop if None
+        :param coalesce_delay: the number of seconds a query waits for others to share its search
+        :param board_cache_size: the maximum number of parsed boards kept
+        """
+        self.executor = executor
+        self.coalesce_delay = coalesce_delay
+        self.board_cache_size = board_cache_size
+        # number of queries answered and of batched searches run to answer them
+        self.queries = 0
+        self.searches = 0
+        # boards parsed, keyed by (value, rows, cols)
+        self.__boards = OrderedDict()
+        # queries waiting for their search, as lists of (end location, future) keyed by
+        # ((value, rows, cols), start location, piece, paths)
+        self.__pending = dict()
+        # searches scheduled or running, referenced until they're done
+        self.__searches = set()
+
+    async def answer(self, query):
+        """
+        Answers a query given as a dict in the JSONL format of the streaming module.
+
+        :param query: the query dict, with an optional "paths" key set to True to find the shortest path
+        :return: the result, as returned by find_min_moves, or find_shortest_path if paths is set
+        """
+        value = query['board']
+        if not isinstance(value, str):
+            value = tuple(tuple(spot) for spot in value)
+        board_key = (value, int(query.get('rows', chess.NUM_ROWS)), int(query.get('cols', chess.NUM_COLS)))
+        start_loc = self.__location(query['start'])
+        end_loc = self.__location(query['end'])
+        piece = query['piece'].lower()
+        if piece not in chess.SUPPORTED_PIECES:
+            raise ValueError('unsupported piece: {!r}'.format(query['piece']))
+        board = self.__board(board_key)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (board_key, start_loc, piece, bool(query.get('paths', False)))
+        group = self.__pending.get(key)
+        if group is None:
+            group = self.__pending[key] = []
+            loop.call_later(self.coalesce_delay, self.__start_search, key, board)
+        group.append((end_loc, future))
+
+        result = await future
+        self.queries += 1
+        return result
+
+    async def handle_client(self, reader, writer):
+        """
+        Answers the query lines read from a client connection, writing every result line as soon as it's answered.
+        """
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.get_running_loop().create_task(self.__answer_line(line, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            writer.close()
+
+    @staticmethod
+    def __location(value):
+        """
+        Returns the given [row, col] location of a query as a tuple, raising ValueError if it isn't a pair of integers.
+        """
+        if not isinstance(value, (list, tuple)) or len(value) != 2 or \
+                not all(isinstance(coordinate, int) and not isinstance(coordinate, bool) for coordinate in value):
+            raise ValueError('location not a [row, col] pair of integers: {!r}'.format(value))
+        return tuple(value)
+
+    def __board(self, board_key):
+        """
+        Returns the Board of the given (value, rows, cols) key, parsing it the first time it's needed.
+        """
+        board = self.__boards.get(board_key)
+        if board is None:
+            board = self.__boards[board_key] = streaming.parse_board(*board_key)
+            while len(self.__boards) > self.board_cache_size:
+                self.__boards.popitem(last=False)
+        else:
+            self.__boards.move_to_end(board_key)
+        return board
+
+    def __start_search(self, key, board):
+        """
+        Starts the search of the queries waiting on the given key, keeping a reference to it until it's done.
+        """
+        task = asyncio.get_running_loop().create_task(self.__search(key, board))
+        self.__searches.add(task)
+        task.add_done_callback(self.__searches.discard)
+
+    async def __search(self, key, board):
+        """
+        Answers the queries waiting on the given key with a single batched search run in the executor.
+        """
+        group = self.__pending.pop(key)
+        board_key, start_loc, piece, paths = key
+        find_batch = chess.find_shortest_paths_batch if paths else chess.find_min_moves_batch
+        self.searches += 1
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, find_batch, board, [(start_loc, end_loc) for end_loc, future in group], piece)
+        except Exception as error:
+            for end_loc, future in group:
+                future.set_exception(error)
+        else:
+            for (end_loc, future), result in zip(group, results):
+                future.set_result(result)
+
+    async def __answer_line(self, line, writer):
+        """
+        Answers a query line, writing its result line.
+        """
+        query_id = None
+        try:
+            query = json.loads(line)
+            query_id = query.get('id')
+            result = await self.answer(query)
+        except Exception as error:
+            # any query failing, even within the search, gets an error line so its client isn't left waiting
+            result_object = {'error': str(error) or type(error).__name__}
+        else:
+            result_object = {'path' if query.get('paths') else 'min_moves': result}
+        if query_id is not None:
+            result_object = dict(id=query_id, **result_object)
+        writer.write((json.dumps(result_object) + '\n').encode())
+        await writer.drain()
+
+
+async def start_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+    """
+    Starts serving the given QueryService over TCP, or over a Unix socket if a path is given.
+
+    :return: the asyncio Server
+    """
+    if unix_path is not None:
+        return await asyncio.start_unix_server(service.handle_client, unix_path)
+    return await asyncio.start_server(service.handle_client, host, port)
+
+
+async def run_load(queries, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Sends queries to a running service over the given number of connections at once, every connection
+    sending its next query as soon as the result of the previous one comes back.
+
+    :param queries: a list of query dicts
+    :param concurrency: the number of connections
+    :return: a tuple of the list of results, in the order of the queries, and the list of their latencies in seconds
+    """
+    results = [None] * len(queries)
+    latencies = [None] * len(queries)
+
+    async def send_queries(indices):
+        if unix_path is not None:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for index in indices:
+                start_time = time.perf_counter()
+                writer.write((json.dumps(dict(queries[index], id=index)) + '\n').encode())
+                await writer.drain()
+                results[index] = json.loads(await reader.readline())
+                latencies[index] = time.perf_counter() - start_time
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    await asyncio.gather(*(send_queries(range(first, len(queries), concurrency))
+                           for first in range(min(concurrency, len(queries)))))
+    return results, latencies
+
+
+def latency_percentiles(latencies, percentiles=PERCENTILES):
+    """
+    Returns a dict mapping every given percentile, and "max", to the latency at that percentile,
+    using the nearest rank method.
+    """
+    latencies = sorted(latencies)
+    summary = {percentile: latencies[max(0, -(-percentile * len(latencies) // 100) - 1)]
+               for percentile in percentiles} if latencies else {}
+    summary['max'] = latencies[-1] if latencies else None
+    return summary
+
+
+def generate_queries(num_rows, num_cols, density, piece, num_queries, seed=benchmark.DEFAULT_SEED, paths=False):
+    """
+    Generates queries on a random board for the load generator, see benchmark.generate_case.
+    Queries share a few start locations, as queries coalesced by the service do.
+    """
+    board, locations = benchmark.generate_case(num_rows, num_cols, density, num_queries, seed)
+    starts = [start_loc for start_loc, end_loc in locations[:max(1, num_queries // 16)]]
+    return [{'board': hex(board.occupied), 'rows': num_rows, 'cols': num_cols, 'start': starts[index % len(starts)],
+             'end': end_loc, 'piece': piece, 'paths': paths}
+            for index, (start_loc, end_loc) in enumerate(locations)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve chess queries to local clients, or measure their latency.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='serve queries until interrupted')
+    load_parser = subparsers.add_parser('load', help='send queries to a running service and report their latency')
+    for command_parser in (serve_parser, load_parser):
+        command_parser.add_argument('--host', default=DEFAULT_HOST, help='host to serve on or connect to')
+        command_parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='TCP port to serve on or connect to')
+        command_parser.add_argument('--unix', help='path of a Unix socket to use instead of TCP')
+
+    serve_parser.add_argument('--processes', type=int, default=0,
+                              help='number of worker processes running the searches, threads if 0')
+    serve_parser.add_argument('--coalesce-delay', type=float, default=DEFAULT_COALESCE_DELAY,
+                              help='seconds a query waits for others to share its search')
+
+    load_parser.add_argument('--queries', type=int, default=1000, help='number of queries to send')
+    load_parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='number of connections')
+    load_parser.add_argument('--size', default='8x8', help='dimensions of the board, e.g. 64x64')
+    load_parser.add_argument('--density', type=float, default=0.3, help='fraction of occupied spots')
+    load_parser.add_argument('--piece', default=chess.KNIGHT, choices=sorted(chess.SUPPORTED_PIECES))
+    load_parser.add_argument('--paths', action='store_true', help='find shortest paths instead of min moves')
+    load_parser.add_argument('--seed', type=int, default=benchmark.DEFAULT_SEED, help='seed of the board and queries')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        asyncio.run(__serve(args))
+        return 0
+
+    num_rows, num_cols = (int(dimension) for dimension in args.size.split('x'))
+    queries = generate_queries(num_rows, num_cols, args.density, args.piece, args.queries, args.seed, args.paths)
+    start_time = time.perf_counter()
+    results, latencies = asyncio.run(run_load(queries, args.host, args.port, args.unix, args.concurrency))
+    seconds = time.perf_counter() - start_time
+
+    errors = sum('error' in result for result in results)
+    print('{} queries in {:.3f} s, {:.0f} queries/s, {} errors'.format(len(queries), seconds, len(queries) / seconds, errors))
+    for percentile, latency in latency_percentiles(latencies).items():
+        print('{:>4} {:>10.3f} ms'.format('p{}'.format(percentile) if percentile != 'max' else 'max', latency * 1e3))
+    return 1 if errors else 0
+
+
+async def __serve(args):
+    """
+    Serves queries with the settings of the serve command until interrupted.
+    """
+    executor = ProcessPoolExecutor(args.processes) if args.processes else None
+    service = QueryService(executor, args.coalesce_delay)
+    server = await start_server(service, args.host, args.port, args.unix)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
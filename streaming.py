@@ -0,0 +1,167 @@
+"""
+Streams chess queries read one line at a time through the solver, producing one result line per query
+as soon as it's answered. Queries are read lazily through generators, so memory use doesn't grow with
+the number of queries, and consecutive queries on the same board reuse the board parsed for the first one.
+
+Boards are given either as a list of occupied [row, col] spots, or as a compact string: the hexadecimal
+bitboard of occupied spots, bit (row * cols + col) being set for an occupied location (e.g. "0x1c1c0000"),
+or a board string of rows separated by '/' (e.g. "8/8/2XX4/8/8/8/8/8", see chess.Board.from_fen).
+Boards have NUM_ROWS rows and NUM_COLS columns unless their dimensions are given along with the query,
+and board strings have the dimensions of their rows. Boards of more than MAX_BOARD_SQUARES squares are rejected.
+
+"""
+import csv
+import json
+import re
+
+import chess
+
+JSONL = 'jsonl'
+CSV = 'csv'
+
+SUPPORTED_FORMATS = {JSONL, CSV}
+
+# largest number of squares of a board parsed from a query, so that a malformed query is rejected
+# before a board of its dimensions is allocated
+MAX_BOARD_SQUARES = 1 << 24
+
+__DIGITS = re.compile(r'\d+')
+
+
+def parse_board(value, num_rows=chess.NUM_ROWS, num_cols=chess.NUM_COLS):
+    """
+    Parses a board given as a list of occupied [row, col] spots, or as a compact hexadecimal bitboard string,
+    or as a board string of rows separated by '/'.
+
+    :param value: the list of occupied spots or the compact board string
+    :param num_rows: the number of rows of the board, ignored for board strings
+    :param num_cols: the number of columns of the board, ignored for board strings
+    :return: the Board
+    """
+    if isinstance(value, str) and '/' in value:
+        # every character of a board string is at most one spot, apart from the runs of empty spots
+        num_squares = len(value) + sum(int(run) for run in __DIGITS.findall(value))
+        if num_squares > MAX_BOARD_SQUARES:
+            raise ValueError('board string of more than {} squares'.format(MAX_BOARD_SQUARES))
+        return chess.Board.from_fen(value)
+    if num_rows < 1 or num_cols < 1 or num_rows * num_cols > MAX_BOARD_SQUARES:
+        raise ValueError('invalid board dimensions: {}x{}'.format(num_rows, num_cols))
+    if isinstance(value, str):
+        return chess.Board.from_bitboard(int(value, 16) if value.strip() else 0, num_rows, num_cols)
+    return chess.Board((tuple(spot) for spot in value), num_rows, num_cols)
+
+
+def answer_lines(lines, fmt=JSONL, paths=False):
+    """
+    Answers the queries read from the given lines, yielding one result line per query.
+
+    A JSONL query is an object with "board", "start" and "end" ([row, col]) and "piece" keys, optional "rows" and
+    "cols" keys giving the dimensions of the board, and an optional "id" echoed back in its result: an object with
+    a "min_moves" (or "path") key, or an "error" key for an invalid query.
+    A CSV query has the columns board, start row, start col, end row, end col and piece, optionally followed by
+    the rows and cols of the board, and its result is the minimum number of moves (or the path as a JSON list),
+    empty if there's none, or "error: " and a message.
+
+    :param lines: an iterable of query lines, e.g. a file
+    :param fmt: the format of the queries and results, JSONL or CSV
+    :param paths: True to find the shortest path of every query rather than its minimum number of moves
+    :return: a generator of result lines, without line endings
+    """
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError('unsupported format: {!r}'.format(fmt))
+
+    # last board parsed, along with the value and dimensions it was parsed from
+    board_value = None
+    board = None
+
+    if fmt == CSV:
+        rows = csv.reader(line for line in lines if line.strip())
+    else:
+        rows = (line for line in lines if line.strip())
+
+    for row in rows:
+        query_id = None
+        try:
+            if fmt == CSV:
+                value, start_row, start_col, end_row, end_col, piece = row[:6]
+                start_loc = (int(start_row), int(start_col))
+                end_loc = (int(end_row), int(end_col))
+                if len(row) == 7:
+                    raise ValueError('board rows given without board cols')
+                num_rows, num_cols = (int(row[6]), int(row[7])) if len(row) > 6 else (chess.NUM_ROWS, chess.NUM_COLS)
+            else:
+                query = json.loads(row)
+                query_id = query.get('id')
+                value = query['board']
+                start_loc = __location(query['start'])
+                end_loc = __location(query['end'])
+                piece = query['piece']
+                num_rows = int(query.get('rows', chess.NUM_ROWS))
+                num_cols = int(query.get('cols', chess.NUM_COLS))
+                if not isinstance(value, str):
+                    value = tuple(tuple(spot) for spot in value)
+
+            if piece.lower() not in chess.SUPPORTED_PIECES:
+                raise ValueError('unsupported piece: {!r}'.format(piece))
+            if board is None or (value, num_rows, num_cols) != board_value:
+                board = parse_board(value, num_rows, num_cols)
+                board_value = (value, num_rows, num_cols)
+
+            if paths:
+                result = chess.find_shortest_path(board, start_loc, end_loc, piece)
+            else:
+                result = chess.find_min_moves(board, start_loc, end_loc, piece)
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            yield __format_error(fmt, query_id, error)
+        else:
+            yield __format_result(fmt, query_id, result, paths)
+
+
+def stream_queries(in_file, out_file, fmt=JSONL, paths=False):
+    """
+    Answers the queries read from one file, writing every result line to the other as soon as it's answered.
+
+    :param in_file: the file to read the queries from, one per line
+    :param out_file: the file to write the results to, one per line
+    :param fmt: the format of the queries and results, JSONL or CSV
+    :param paths: True to find the shortest path of every query rather than its minimum number of moves
+    """
+    for result_line in answer_lines(in_file, fmt, paths):
+        out_file.write(result_line + '\n')
+        out_file.flush()
+
+
+def __location(value):
+    """
+    Returns the given [row, col] location of a JSONL query as a tuple, raising ValueError if it isn't a pair.
+    """
+    location = tuple(value)
+    if len(location) != 2:
+        raise ValueError('location not a [row, col] pair: {!r}'.format(value))
+    return location
+
+
+def __format_result(fmt, query_id, result, paths):
+    """
+    Formats the result of a query as a line of the given format.
+    """
+    if fmt == CSV:
+        if result is None:
+            return ''
+        return json.dumps(result) if paths else str(result)
+
+    result_object = dict() if query_id is None else {'id': query_id}
+    result_object['path' if paths else 'min_moves'] = result
+    return json.dumps(result_object)
+
+
+def __format_error(fmt, query_id, error):
+    """
+    Formats the error of an invalid query as a line of the given format.
+    """
+    if fmt == CSV:
+        return 'error: {}'.format(error)
+
+    error_object = dict() if query_id is None else {'id': query_id}
+    error_object['error'] = str(error)
+    return json.dumps(error_object)
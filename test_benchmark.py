@@ -0,0 +1,45 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+import benchmark
+import chess
+
+
+class TestBenchmark(TestCase):
+
+    def test_generate_case(self):
+        # same seed, same board and queries
+        board, queries = benchmark.generate_case(16, 12, 0.3, 20, seed=5)
+        self.assertEqual((board, queries), benchmark.generate_case(16, 12, 0.3, 20, seed=5))
+        self.assertNotEqual(board, benchmark.generate_case(16, 12, 0.3, 20, seed=6)[0])
+        self.assertEqual(round(0.3 * 16 * 12), bin(board.occupied).count('1'))
+        self.assertEqual(20, len(queries))
+        for start_loc, end_loc in queries:
+            self.assertFalse(board.is_occupied(start_loc))
+            self.assertFalse(board.is_occupied(end_loc))
+
+    def test_run_benchmarks(self):
+        report = benchmark.run_benchmarks(sizes=[(8, 8), (10, 6)], densities=[0.0, 0.6], num_queries=4, repeat=1)
+        self.assertEqual(2 * 2 * len(benchmark.FUNCTIONS) * len(chess.SUPPORTED_PIECES), len(report['results']))
+        self.assertIn('find_min_moves/knight/10x6/0.60', [result['name'] for result in report['results']])
+
+        # every timing starts from a board without components labelled by earlier timings
+        time_calls = getattr(benchmark, '__time_calls')
+        boards = []
+
+        def record_board(function, board, queries, piece):
+            boards.append((board, dict(board.components)))
+            return time_calls(function, board, queries, piece)
+
+        with patch('benchmark.__time_calls', side_effect=record_board):
+            benchmark.run_benchmarks(sizes=[(8, 8)], densities=[0.6], num_queries=8, repeat=3)
+        self.assertEqual(len(boards), len({id(board) for board, components in boards}))
+        self.assertEqual([{}] * len(boards), [components for board, components in boards])
+
+        # a benchmark more than threshold times slower than the baseline is a regression
+        baseline = {'results': [dict(result) for result in report['results']]}
+        baseline['results'][0]['us_per_call'] /= 2
+        comparisons = benchmark.compare_reports(report, baseline, threshold=1.5)
+        self.assertEqual(len(report['results']), len(comparisons))
+        self.assertEqual([report['results'][0]['name']],
+                         [comparison['name'] for comparison in comparisons if comparison['regression']])
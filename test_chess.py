@@ -1,4 +1,7 @@
-from unittest import TestCase
+import os
+import random
+import tempfile
+from unittest import TestCase, skipIf
 
 import chess
 from chess import generate_board
@@ -9,6 +12,11 @@ from chess import generate_possible_moves
 from chess import is_on_same_color
 from chess import find_shortest_path
 from chess import find_min_moves
+from chess import Board
+from chess import find_shortest_paths_batch
+from chess import find_min_moves_batch
+from chess import distance_field
+from chess import reconstruct_path
 
 class TestChessLib(TestCase):
 
@@ -38,6 +46,105 @@ class TestChessLib(TestCase):
                 self.assertEqual(chess.OCCUPIED_CHAR, board[row][col])
 
 
+    def test_board(self):
+        # board matches the grid generated for the same occupied spots, out of bounds spots ignored
+        occupied_spots = {(2, 3), (1, 1), (7, 3), (9, 12), (-1, 2)}
+        board = Board(occupied_spots)
+        self.assertEqual(generate_board(occupied_spots), board.to_grid())
+        self.assertEqual(board, Board.from_grid(generate_board(occupied_spots)))
+
+        # empty mask is the complement of the occupied spots
+        self.assertEqual(chess.FULL_MASK, Board().empty)
+        self.assertEqual(0, Board({(row, col) for row in range(chess.NUM_ROWS)
+                                   for col in range(chess.NUM_COLS)}).empty)
+        self.assertEqual(chess.FULL_MASK, board.empty | board.occupied)
+
+        # occupy and free spots
+        board = Board()
+        board.occupy((4, 5))
+        self.assertTrue(board.is_occupied((4, 5)))
+        self.assertTrue(is_occupied_spot(board, (4, 5)))
+        board.free((4, 5))
+        self.assertFalse(board.is_occupied((4, 5)))
+        self.assertIsNone(board.is_occupied((4, 8)))
+
+        # functions give the same results for a board and its grid
+        occupied_spots = {(2, 2), (2, 3), (3, 3), (3, 2), (3, 4), (4, 4)}
+        board = Board(occupied_spots)
+        grid = generate_board(occupied_spots)
+        for piece in chess.SUPPORTED_PIECES:
+            self.assertEqual(generate_possible_moves(grid, (4, 3), piece),
+                             generate_possible_moves(board, (4, 3), piece))
+            self.assertEqual(find_min_moves(grid, (4, 1), (2, 5), piece),
+                             find_min_moves(board, (4, 1), (2, 5), piece))
+        moves = {(1, -1), (2, 3), (4, 12), (3, 5)}
+        self.assertEqual(keep_valid_moves(grid, moves), keep_valid_moves(board, moves))
+
+    def test_board_dimensions(self):
+        # boards of any dimensions, out of bounds spots ignored
+        occupied_spots = {(1, 1), (4, 8), (2, 6), (8, 4), (-1, 2)}
+        board = Board(occupied_spots, 5, 9)
+        grid = generate_board(occupied_spots, 5, 9)
+        self.assertEqual(5, len(grid))
+        self.assertEqual(9, len(grid[0]))
+        self.assertEqual(grid, board.to_grid())
+        self.assertEqual(board, Board.from_grid(grid))
+        self.assertEqual(board, Board.from_bitboard(board.occupied, 5, 9))
+        self.assertNotEqual(board, Board(occupied_spots, 9, 5))
+        self.assertTrue(is_within_board((4, 8), board))
+        self.assertFalse(is_within_board((4, 8)))
+        self.assertFalse(is_within_board((5, 0), grid))
+
+        # hashes are updated as spots are occupied and freed
+        zobrist, zobrist_check = board.zobrist, board.zobrist_check
+        self.assertNotEqual(zobrist, zobrist_check)
+        board.occupy((3, 7))
+        self.assertNotEqual(zobrist, board.zobrist)
+        self.assertNotEqual(zobrist_check, board.zobrist_check)
+        self.assertEqual(Board.from_bitboard(board.occupied).zobrist_check, board.zobrist_check)
+        board.free((3, 7))
+        self.assertEqual((zobrist, zobrist_check), (board.zobrist, board.zobrist_check))
+        # mutable boards aren't hashable
+        self.assertRaises(TypeError, hash, board)
+
+        # moves stop at the edges of the board
+        expected = {(1, 7), (2, 7), (3, 7), (4, 7), (0, 8)} | {(0, col) for col in range(7)}
+        self.assertEqual(expected, generate_possible_moves(board, (0, 7), chess.ROOK))
+        expected = {(2, 5), (1, 4), (0, 3), (2, 7), (1, 8), (4, 5), (4, 7)}
+        self.assertEqual(expected, generate_possible_moves(board, (3, 6), chess.BISHOP))
+        expected = {(0, 0), (4, 0), (0, 2), (4, 2), (1, 3), (3, 3)}
+        self.assertEqual(expected, generate_possible_moves(grid, (2, 1), chess.KNIGHT))
+
+        # searches agree with each other and with a distance field on random boards of several dimensions
+        rand = random.Random(12)
+        for num_rows, num_cols in ((5, 9), (12, 12), (1, 20), (17, 3)):
+            board = Board({(rand.randrange(num_rows), rand.randrange(num_cols)) for spot in range(num_rows * num_cols // 5)},
+                          num_rows, num_cols)
+            start_loc = (0, 0)
+            board.free(start_loc)
+            for piece in chess.SUPPORTED_PIECES:
+                distances, loc_to_parent = distance_field(board, start_loc, piece)
+                self.assertEqual(num_rows, len(distances))
+                self.assertEqual(num_cols, len(distances[0]))
+                for end_loc in ((num_rows - 1, num_cols - 1), (num_rows // 2, num_cols // 2), (0, num_cols - 1)):
+                    expected = distances[end_loc[0]][end_loc[1]]
+                    if piece == chess.BISHOP and not is_on_same_color(start_loc, end_loc, board):
+                        expected = None
+                    self.assertEqual(expected, find_min_moves(board, start_loc, end_loc, piece))
+                    for search in chess.SUPPORTED_SEARCHES:
+                        path = find_shortest_path(board, start_loc, end_loc, piece, search)
+                        self.assertEqual(expected, None if path is None else len(path) - 1)
+                        for loc, next_loc in zip(path or (), (path or ())[1:]):
+                            self.assertIn(next_loc, generate_possible_moves(board, loc, piece))
+
+        # large boards
+        board = Board(num_rows=300, num_cols=300)
+        self.assertEqual(200, find_min_moves(board, (0, 0), (299, 299), chess.KNIGHT))
+        board.occupy((150, 0))
+        self.assertEqual(200, find_min_moves(board, (0, 0), (299, 299), chess.KNIGHT))
+        self.assertEqual(201, len(find_shortest_path(board, (0, 0), (299, 299), chess.KNIGHT)))
+        self.assertEqual(2, find_min_moves(board, (0, 0), (299, 299), chess.ROOK))
+
     def test_is_within_board(self):
         # test middle valid
         cur_loc = (2, 3)
@@ -236,6 +343,13 @@ class TestChessLib(TestCase):
         result = generate_possible_moves(board, cur_loc, chess.KING)
         self.assertIsNone(result)
 
+        # 2D lists of any dimensions, other characters than OCCUPIED_CHAR being empty spots, move like Boards
+        board = Board({(1, 2), (4, 4), (5, 9), (3, 7)}, 7, 11)
+        grid = board.to_grid()
+        grid[0][0] = '-'
+        for piece in chess.SUPPORTED_PIECES:
+            for cur_loc in [(3, 3), (0, 10), (6, 0), (4, 4)]:
+                self.assertEqual(generate_possible_moves(board, cur_loc, piece), generate_possible_moves(grid, cur_loc, piece))
 
     def test_is_on_same_color(self):
         # on same color white
@@ -437,3 +551,595 @@ class TestChessLib(TestCase):
         self.assertEqual(result, 0)
 
 
+    def test_find_min_moves_unobstructed(self):
+        # answers computed without search match the length of the paths found by search,
+        # on an empty board and on boards with blockers out of the way or in the way
+        locations = [(row, col) for row in range(chess.NUM_ROWS) for col in range(chess.NUM_COLS)]
+        for occupied_spots in [set(), {(0, 7), (7, 0)}, {(3, 3), (3, 4), (4, 3), (4, 4)}]:
+            board = Board(occupied_spots)
+            for piece in chess.SUPPORTED_PIECES:
+                for start_loc in locations[::3]:
+                    for end_loc in locations:
+                        path = find_shortest_path(board, start_loc, end_loc, piece)
+                        expected = None if path is None else len(path) - 1
+                        self.assertEqual(expected, find_min_moves(board, start_loc, end_loc, piece))
+
+        # bishop on an empty board takes at most 2 moves
+        board = Board()
+        self.assertEqual(2, find_min_moves(board, (0, 0), (7, 1), chess.BISHOP))
+
+        # knight corner special case
+        self.assertEqual(4, find_min_moves(board, (0, 0), (1, 1), chess.KNIGHT))
+        self.assertEqual(2, find_min_moves(board, (2, 2), (3, 3), chess.KNIGHT))
+
+        # rook turning around a blocker in one corner
+        board = Board({(0, 7)})
+        self.assertEqual(2, find_min_moves(board, (0, 0), (7, 7), chess.ROOK))
+
+    def test_path_cache(self):
+        cache = chess.enable_cache(max_size=2)
+        self.addCleanup(chess.disable_cache)
+        self.assertIs(cache, chess.get_cache())
+
+        # repeated query is answered from the cache, and returned paths can be modified
+        board = Board({(2, 2), (2, 3), (3, 3), (3, 2), (3, 4), (4, 4)})
+        path = find_shortest_path(board, (4, 1), (2, 5), chess.KNIGHT)
+        expected = list(path)
+        path.append((0, 0))
+        self.assertEqual(expected, find_shortest_path(board, (4, 1), (2, 5), chess.KNIGHT))
+        self.assertEqual(4, find_min_moves(board, (4, 1), (2, 5), chess.KNIGHT))
+        self.assertEqual((2, 1, 0, 2, 1), tuple(cache.info()))
+
+        # hash follows changes to the board, so a modified board misses the cache
+        board.occupy((6, 2))
+        board.occupy((6, 2))
+        self.assertEqual(Board.from_bitboard(board.occupied).zobrist, board.zobrist)
+        find_shortest_path(board, (4, 1), (2, 5), chess.KNIGHT)
+        self.assertEqual((2, 2, 0, 2, 2), tuple(cache.info()))
+        board.free((6, 2))
+        self.assertEqual(Board({(2, 2), (2, 3), (3, 3), (3, 2), (3, 4), (4, 4)}).zobrist, board.zobrist)
+        find_shortest_path(board, (4, 1), (2, 5), chess.KNIGHT)
+        self.assertEqual((3, 2, 0, 2, 2), tuple(cache.info()))
+
+        # unreachable results are cached too, least recently used path is evicted when full
+        board = Board({(4, 4), (5, 5), (5, 3), (6, 4)})
+        self.assertIsNone(find_shortest_path(board, (2, 1), (5, 4), chess.ROOK))
+        self.assertIsNone(find_shortest_path(board, (2, 1), (5, 4), chess.ROOK))
+        self.assertEqual((4, 3, 1, 2, 2), tuple(cache.info()))
+
+        chess.disable_cache()
+        self.assertIsNone(chess.get_cache())
+
+        # negative sizes are rejected, leaving caching disabled
+        self.assertRaises(ValueError, chess.PathCache, -1)
+        self.assertRaises(ValueError, chess.enable_cache, -1)
+        self.assertIsNone(chess.get_cache())
+
+    def test_find_batch(self):
+        board = Board({(2, 2), (2, 3), (3, 3), (3, 2), (3, 4), (4, 4), (6, 1)})
+        starts = [(4, 1), (0, 0), (2, 2), (-1, 3), (5, 5)]
+        ends = [(2, 5), (0, 0), (6, 1), (7, 7), (4, 1), (9, 9), (1, 6), (3, 0)]
+        queries = [(start_loc, end_loc) for start_loc in starts for end_loc in ends]
+
+        # batch results match the results of every query on its own
+        for piece in chess.SUPPORTED_PIECES:
+            expected_paths = [find_shortest_path(board, start_loc, end_loc, piece) for start_loc, end_loc in queries]
+            self.assertEqual(expected_paths, find_shortest_paths_batch(board, queries, piece))
+            expected_moves = [find_min_moves(board, start_loc, end_loc, piece) for start_loc, end_loc in queries]
+            self.assertEqual(expected_moves, find_min_moves_batch(board.to_grid(), queries, piece))
+
+        # piece given per query
+        queries = [((4, 1), (2, 5), chess.KNIGHT), ((4, 1), (2, 5), chess.KING), ((4, 1), (2, 5))]
+        expected_moves = [find_min_moves(board, (4, 1), (2, 5), piece) for piece in (chess.KNIGHT, chess.KING, chess.ROOK)]
+        self.assertEqual(expected_moves, find_min_moves_batch(board, queries, chess.ROOK))
+
+        # large boards get the same paths as every query on its own
+        rand = random.Random(5)
+        for num_rows, num_cols in [(16, 16), (14, 20), (20, 20)]:
+            squares = [(row, col) for row in range(num_rows) for col in range(num_cols)]
+            board = Board(rand.sample(squares, len(squares) * 3 // 10), num_rows, num_cols)
+            locations = rand.sample(squares, 12)
+            queries = [(start_loc, end_loc) for start_loc in locations[:4] for end_loc in locations]
+            for piece in chess.SUPPORTED_PIECES:
+                self.assertEqual([find_shortest_path(board, start_loc, end_loc, piece) for start_loc, end_loc in queries],
+                                 find_shortest_paths_batch(board, queries, piece))
+
+        rand = random.Random(5)
+        board = Board(rand.sample([(row, col) for row in range(16) for col in range(16)], 70), 16, 16)
+        locations = [(rand.randrange(16), rand.randrange(16)) for location in range(12)]
+        queries = [(start_loc, end_loc) for start_loc in locations[:4] for end_loc in locations]
+        for piece in chess.SUPPORTED_PIECES:
+            paths = find_shortest_paths_batch(board, queries, piece)
+            self.assertEqual([find_min_moves(board, start_loc, end_loc, piece) for start_loc, end_loc in queries],
+                             [None if path is None else len(path) - 1 for path in paths])
+            self.assertEqual([find_min_moves(board, start_loc, end_loc, piece) for start_loc, end_loc in queries],
+                             find_min_moves_batch(board, queries, piece))
+
+        # no queries
+        self.assertEqual([], find_shortest_paths_batch(board, [], chess.KING))
+
+    def test_distance_field(self):
+        locations = [(row, col) for row in range(chess.NUM_ROWS) for col in range(chess.NUM_COLS)]
+
+        # distances and reconstructed paths match the ones of every query on its own
+        board = Board({(2, 2), (2, 3), (3, 3), (3, 2), (3, 4), (4, 4), (6, 1), (0, 1), (1, 0)})
+        for piece in chess.SUPPORTED_PIECES:
+            for start_loc in [(4, 1), (0, 0), (7, 7)]:
+                distances, loc_to_parent = distance_field(board, start_loc, piece)
+                for end_loc in locations:
+                    expected = find_min_moves(board, start_loc, end_loc, piece)
+                    self.assertEqual(expected, distances[end_loc[0]][end_loc[1]])
+                    path = reconstruct_path(loc_to_parent, start_loc, end_loc)
+                    if expected is None:
+                        self.assertIsNone(path)
+                    else:
+                        self.assertEqual(expected, len(path) - 1)
+                        self.assertEqual(start_loc, path[0])
+                        self.assertEqual(end_loc, path[-1])
+                        for loc, next_loc in zip(path, path[1:]):
+                            self.assertIn(next_loc, generate_possible_moves(board, loc, piece))
+
+        # bishop can't reach the other color
+        distances, loc_to_parent = distance_field(generate_board({}), (0, 0), chess.BISHOP)
+        self.assertIsNone(distances[0][1])
+        self.assertEqual(2, distances[0][2])
+
+        # out of bounds start location
+        self.assertIsNone(distance_field(board, (8, 0), chess.KING))
+
+    def test_count_shortest_paths(self):
+        # paths of a rook turning on either corner, a king moving along a row from a corner (Motzkin numbers)
+        self.assertEqual(2, chess.count_shortest_paths(Board(), (0, 0), (7, 7), chess.ROOK))
+        self.assertEqual(1, chess.count_shortest_paths(Board(), (0, 0), (7, 7), chess.KING))
+        self.assertEqual(127, chess.count_shortest_paths(Board(), (0, 0), (0, 7), chess.KING))
+        motzkin = [1, 1]
+        for length in range(2, 200):
+            motzkin.append(((2 * length + 1) * motzkin[-1] + (3 * length - 3) * motzkin[-2]) // (length + 2))
+        self.assertEqual(motzkin[199], chess.count_shortest_paths(Board(num_rows=200, num_cols=200), (0, 0), (0, 199),
+                                                                  chess.KING))
+
+        # every shortest path is generated once
+        occupied_spots = {(2, 2), (2, 3), (3, 3), (3, 2), (3, 4), (4, 4), (6, 1), (0, 1), (1, 0), (4, 1)}
+        board = Board(occupied_spots)
+        for piece in chess.SUPPORTED_PIECES:
+            for start_loc, end_loc in (((4, 1), (2, 5)), ((0, 0), (7, 7)), ((5, 6), (1, 1)), ((7, 0), (0, 7))):
+                paths = list(chess.iter_shortest_paths(board, start_loc, end_loc, piece))
+                self.assertEqual(chess.count_shortest_paths(board, start_loc, end_loc, piece), len(paths))
+                self.assertEqual(len(paths), len({tuple(path) for path in paths}))
+                for path in paths:
+                    self.assertEqual(find_min_moves(board, start_loc, end_loc, piece), len(path) - 1)
+                    self.assertEqual((start_loc, end_loc), (path[0], path[-1]))
+                    for loc, next_loc in zip(path, path[1:]):
+                        self.assertIn(next_loc, generate_possible_moves(board, loc, piece))
+
+        # no path, same start and end location, invalid queries
+        self.assertEqual(0, chess.count_shortest_paths(board, (0, 0), (0, 1), chess.KING))
+        self.assertEqual([], list(chess.iter_shortest_paths(board, (0, 0), (0, 1), chess.KING)))
+        self.assertEqual(1, chess.count_shortest_paths(board, (5, 5), (5, 5), chess.KNIGHT))
+        self.assertEqual([[(5, 5)]], list(chess.iter_shortest_paths(board, (5, 5), (5, 5), chess.KNIGHT)))
+        self.assertIsNone(chess.count_shortest_paths(board, (0, 0), (8, 1), chess.KING))
+        self.assertIsNone(chess.iter_shortest_paths(board, (0, 0), (1, 1), 'queen'))
+
+    def test_distance_field_updates(self):
+        # distances match a new distance field after every spot occupied or freed
+        rand = random.Random(14)
+        for num_rows, num_cols in ((8, 8), (6, 11)):
+            board = Board({(rand.randrange(num_rows), rand.randrange(num_cols)) for spot in range(12)},
+                          num_rows, num_cols)
+            for piece in chess.SUPPORTED_PIECES:
+                field = chess.DistanceField(board, (2, 3), piece)
+                for step in range(60):
+                    loc = (rand.randrange(num_rows), rand.randrange(num_cols))
+                    if step % 2:
+                        field.occupy(loc)
+                    else:
+                        field.free(loc)
+                    distances, loc_to_parent = distance_field(field.board, (2, 3), piece)
+                    self.assertEqual(distances, field.distances())
+                    self.assertEqual(distances[loc[0]][loc[1]], field.distance(loc))
+                    path = field.path(loc)
+                    self.assertEqual(distances[loc[0]][loc[1]], None if path is None else len(path) - 1)
+                    for cur_loc, next_loc in zip(path or (), (path or ())[1:]):
+                        self.assertIn(next_loc, generate_possible_moves(field.board, cur_loc, piece))
+
+        # the start location is kept free and the given board isn't changed
+        board = Board({(2, 3)})
+        field = chess.DistanceField(board, (2, 3), chess.ROOK)
+        field.occupy((2, 3))
+        self.assertEqual(0, field.distance((2, 3)))
+        self.assertTrue(board.is_occupied((2, 3)))
+
+        # a spot toggled far from the start location updates only a few locations of a large board
+        field = chess.DistanceField(Board(num_rows=64, num_cols=64), (0, 0), chess.ROOK)
+        stats = chess.SearchStats()
+        field.occupy((40, 40), stats)
+        self.assertEqual(2, field.distance((40, 50)))
+        field.free((40, 40), stats)
+        self.assertLess(stats.nodes_expanded, 64)
+
+        with self.assertRaises(ValueError):
+            chess.DistanceField(board, (8, 0), chess.ROOK)
+
+    def test_find_shortest_path_bidirectional(self):
+        locations = [(row, col) for row in range(chess.NUM_ROWS) for col in range(chess.NUM_COLS)]
+
+        # paths found from both ends are as short as the paths of the one-directional search,
+        # including with the start location marked as occupied
+        occupied_spots = {(2, 2), (2, 3), (3, 3), (3, 2), (3, 4), (4, 4), (6, 1), (0, 1), (1, 0), (4, 1)}
+        board = Board(occupied_spots)
+        for piece in chess.SUPPORTED_PIECES:
+            for start_loc in [(4, 1), (0, 0), (7, 7), (5, 6)]:
+                for end_loc in locations:
+                    expected = find_shortest_path(board, start_loc, end_loc, piece, chess.BFS)
+                    path = find_shortest_path(board, start_loc, end_loc, piece, chess.BIDIRECTIONAL)
+                    if expected is None:
+                        self.assertIsNone(path)
+                    else:
+                        self.assertEqual(len(expected), len(path))
+                        self.assertEqual(start_loc, path[0])
+                        self.assertEqual(end_loc, path[-1])
+                        for loc, next_loc in zip(path, path[1:]):
+                            self.assertIn(next_loc, generate_possible_moves(board, loc, piece))
+
+        # searching from both ends expands fewer nodes around a wall
+        board = Board({(4, col) for col in range(7)})
+        stats = chess.SearchStats()
+        self.assertEqual(14, find_min_moves(board, (0, 0), (7, 0), chess.KING, chess.BFS, stats))
+        self.assertEqual(chess.BFS, stats.search)
+        bfs_nodes_expanded = stats.nodes_expanded
+        stats = chess.SearchStats()
+        self.assertEqual(14, find_min_moves(board, (0, 0), (7, 0), chess.KING, chess.BIDIRECTIONAL, stats))
+        self.assertEqual(chess.BIDIRECTIONAL, stats.search)
+        self.assertLess(stats.nodes_expanded, bfs_nodes_expanded)
+
+        # no search run for an answer known in closed form
+        stats = chess.SearchStats()
+        self.assertEqual(7, find_min_moves(Board(), (0, 0), (7, 7), chess.KING, chess.BIDIRECTIONAL, stats))
+        self.assertIsNone(stats.search)
+        self.assertEqual(0, stats.nodes_expanded)
+
+        # unsupported search
+        with self.assertRaises(ValueError):
+            find_shortest_path(board, (0, 0), (7, 0), chess.KING, 'dfs')
+
+    def test_find_shortest_path_astar(self):
+        locations = [(row, col) for row in range(chess.NUM_ROWS) for col in range(chess.NUM_COLS)]
+
+        # paths found by A* are as short as the paths of the BFS
+        occupied_spots = {(2, 2), (2, 3), (3, 3), (3, 2), (3, 4), (4, 4), (6, 1), (0, 1), (1, 0), (4, 1)}
+        board = Board(occupied_spots)
+        for piece in chess.SUPPORTED_PIECES:
+            for start_loc in [(4, 1), (0, 0), (7, 7), (5, 6)]:
+                for end_loc in locations:
+                    expected = find_shortest_path(board, start_loc, end_loc, piece, chess.BFS)
+                    path = find_shortest_path(board, start_loc, end_loc, piece, chess.ASTAR)
+                    if expected is None:
+                        self.assertIsNone(path)
+                    else:
+                        self.assertEqual(len(expected), len(path))
+                        self.assertEqual(start_loc, path[0])
+                        self.assertEqual(end_loc, path[-1])
+                        for loc, next_loc in zip(path, path[1:]):
+                            self.assertIn(next_loc, generate_possible_moves(board, loc, piece))
+
+        # A* expands only a few nodes for an end location close to the start location on a large board
+        board = Board({(row, 100) for row in range(90, 110)}, 256, 256)
+        for piece in (chess.KING, chess.KNIGHT):
+            stats = chess.SearchStats()
+            expected = find_min_moves(board, (100, 95), (100, 105), piece, chess.BFS, stats)
+            bfs_nodes_expanded = stats.nodes_expanded
+            stats = chess.SearchStats()
+            self.assertEqual(expected, find_min_moves(board, (100, 95), (100, 105), piece, chess.ASTAR, stats))
+            self.assertEqual(chess.ASTAR, stats.search)
+            self.assertLess(stats.nodes_expanded * 5, bfs_nodes_expanded)
+
+        # no search run for a bishop on the other color
+        stats = chess.SearchStats()
+        self.assertIsNone(find_shortest_path(board, (0, 0), (0, 201), chess.BISHOP, chess.ASTAR, stats))
+        self.assertIsNone(stats.search)
+
+    def test_find_min_moves_without_path(self):
+        # level numbers of the bitboard search match the length of the paths found by search
+        locations = [(row, col) for row in range(chess.NUM_ROWS) for col in range(chess.NUM_COLS)]
+        board = Board({(2, 2), (2, 3), (3, 3), (3, 2), (3, 4), (4, 4), (6, 1), (0, 1), (1, 0), (5, 6), (6, 5)})
+        for piece in chess.SUPPORTED_PIECES:
+            for start_loc in locations[::5]:
+                for end_loc in locations:
+                    path = find_shortest_path(board, start_loc, end_loc, piece, chess.BFS)
+                    stats = chess.SearchStats()
+                    result = find_min_moves(board, start_loc, end_loc, piece, stats=stats)
+                    self.assertEqual(None if path is None else len(path) - 1, result)
+                    if stats.search is not None:
+                        self.assertEqual(chess.LEVEL_BFS, stats.search)
+                        self.assertGreater(stats.nodes_expanded, 0)
+
+    @skipIf(chess.numpy is None, 'requires numpy')
+    def test_distance_fields(self):
+        # distances on a stack of boards match the distance field of every board on its own
+        rng = random.Random(9)
+        occupied_spots = [{(row, col) for row in range(chess.NUM_ROWS) for col in range(chess.NUM_COLS)
+                           if rng.random() < density} for density in (0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6)]
+        occupancy = [[[(row, col) in spots for col in range(chess.NUM_COLS)] for row in range(chess.NUM_ROWS)]
+                     for spots in occupied_spots]
+        for piece in chess.SUPPORTED_PIECES:
+            for start_loc in [(0, 0), (3, 4), (7, 6)]:
+                result = chess.distance_fields(occupancy, start_loc, piece)
+                self.assertEqual((len(occupancy), chess.NUM_ROWS, chess.NUM_COLS), result.shape)
+                for index, spots in enumerate(occupied_spots):
+                    distances = distance_field(Board(spots), start_loc, piece)[0]
+                    expected = [[chess.UNREACHABLE if distance is None else distance for distance in row]
+                                for row in distances]
+                    self.assertEqual(expected, result[index].tolist())
+
+        # out of bounds start location
+        self.assertIsNone(chess.distance_fields(occupancy, (8, 0), chess.KING))
+
+    def test_search_stats(self):
+        board = Board({(4, col) for col in range(7)})
+
+        # moves generated and blocked on the way around the wall, for every search
+        for search in (chess.BFS, chess.BIDIRECTIONAL, chess.ASTAR):
+            stats = chess.SearchStats()
+            self.assertEqual(15, len(find_shortest_path(board, (0, 0), (7, 0), chess.KING, search, stats)))
+            self.assertEqual(search, stats.search)
+            self.assertGreater(stats.moves_generated, stats.nodes_expanded)
+            self.assertGreater(stats.moves_rejected, 0)
+            self.assertGreater(stats.frontier_peak, 0)
+            self.assertGreater(stats.movegen_seconds, 0)
+            self.assertGreater(stats.bookkeeping_seconds, 0)
+
+        # the bitboard search counts the locations reached by every level, under a search name of its own
+        stats = chess.SearchStats()
+        self.assertEqual(14, find_min_moves(board, (0, 0), (7, 0), chess.KING, stats=stats))
+        self.assertEqual(chess.LEVEL_BFS, stats.search)
+        self.assertGreater(stats.moves_generated, 0)
+        self.assertGreater(stats.moves_rejected, 0)
+        bfs_stats = chess.SearchStats()
+        self.assertEqual(14, find_min_moves(board, (0, 0), (7, 0), chess.KING, chess.BFS, bfs_stats))
+        self.assertEqual(chess.BFS, bfs_stats.search)
+        self.assertGreaterEqual(stats.nodes_expanded, bfs_stats.nodes_expanded)
+
+        # moves of a single location, and moves rejected as occupied or out of the board
+        stats = chess.SearchStats()
+        self.assertEqual({(3, 6), (3, 7), (5, 6), (5, 7)}, generate_possible_moves(board, (4, 7), chess.KING, stats))
+        self.assertEqual(4, stats.moves_generated)
+        self.assertEqual(1, stats.moves_rejected)
+        stats = chess.SearchStats()
+        self.assertEqual({(5, 0)}, chess.keep_valid_moves(board, {(4, 0), (5, 0), (8, 0)}, stats))
+        self.assertEqual(2, stats.moves_rejected)
+
+    def test_find_shortest_path_compact(self):
+        board = Board({(2, 2), (2, 3), (3, 3), (3, 2), (3, 4), (4, 4)})
+
+        # the compact path holds the square indices of the locations of the path
+        for search in (chess.BFS, chess.BIDIRECTIONAL, chess.ASTAR):
+            path = find_shortest_path(board, (4, 1), (2, 5), chess.KNIGHT, search, compact=True)
+            self.assertEqual('H', path.typecode)
+            self.assertEqual(5, len(path))
+            self.assertEqual([33, 21], [path[0], path[-1]])
+            for square, next_square in zip(path, path[1:]):
+                self.assertIn(divmod(next_square, 8), generate_possible_moves(board, divmod(square, 8), chess.KNIGHT))
+        self.assertEqual([9], list(find_shortest_path(board, (1, 1), (1, 1), chess.KING, compact=True)))
+        self.assertIsNone(find_shortest_path(board, (0, 0), (2, 2), chess.KING, compact=True))
+
+        # larger typecode on boards with more squares than fit in 16 bits
+        path = find_shortest_path(Board((), 300, 300), (0, 0), (299, 0), chess.ROOK, compact=True)
+        self.assertEqual('I', path.typecode)
+        self.assertEqual([0, 299 * 300], list(path))
+
+    def test_connected_components(self):
+        # a wall splits the board in two for every piece but the knight
+        board = Board({(3, col) for col in range(8)})
+        components = chess.connected_components(board, chess.ROOK)
+        self.assertEqual([0] * 8, components[0])
+        self.assertEqual([None] * 8, components[3])
+        self.assertEqual([1] * 8, components[7])
+        self.assertEqual({0}, {label for row in chess.connected_components(board, chess.KNIGHT) for label in row} - {None})
+        self.assertIsNone(chess.connected_components(board, 'queen'))
+
+        # an unreachable query labels the components, which then answer queries without searching
+        board = Board({(3, col) for col in range(8)})
+        self.assertIsNone(find_min_moves(board, (0, 0), (7, 7), chess.KING))
+        self.assertIn(chess.KING, board.components)
+        stats = chess.SearchStats()
+        self.assertIsNone(find_shortest_path(board, (0, 1), (6, 2), chess.KING, stats=stats))
+        self.assertIsNone(stats.search)
+        self.assertEqual([1, None], find_min_moves_batch(board, [((0, 0), (1, 1)), ((0, 0), (5, 5))], chess.KING))
+        self.assertEqual(0, chess.count_shortest_paths(board, (0, 0), (5, 5), chess.KING))
+
+        # an occupied start location reaches the components of its moves
+        self.assertEqual(1, find_min_moves(board, (3, 3), (4, 4), chess.KING))
+        self.assertEqual(1, find_min_moves(board, (3, 3), (2, 2), chess.KING))
+
+        # labels are dropped as soon as the board changes
+        board.free((3, 5))
+        self.assertEqual({}, board.components)
+        self.assertEqual(9, find_min_moves(board, (0, 0), (7, 7), chess.KING))
+
+    def test_distance_tables(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(chess.load_distance_tables)
+        path = os.path.join(directory.name, 'tables.bin')
+
+        # tables of every piece for every size, mapped from the file
+        written = chess.write_distance_tables(path, [(3, 3), (5, 6)])
+        self.assertEqual(8, len(written))
+        self.assertEqual(sorted(written), sorted(chess.load_distance_tables(path)))
+        self.assertEqual(chess.TABLES_HEADER.size + 8 * chess.TABLE_ENTRY.size + 4 * 9 * 9 + 4 * 30 * 30,
+                         os.path.getsize(path))
+
+        # empty board answers, including an occupied start location and unreachable locations
+        board = Board((), 5, 6)
+        for piece in chess.SUPPORTED_PIECES:
+            for end_loc in [(0, 0), (4, 5), (2, 3), (1, 4)]:
+                expected = find_min_moves(board, (3, 1), end_loc, piece, chess.BFS)
+                self.assertEqual(expected, find_min_moves(board, (3, 1), end_loc, piece))
+                self.assertEqual(expected, find_min_moves(Board({(3, 1)}, 5, 6), (3, 1), end_loc, piece))
+        self.assertIsNone(find_min_moves(Board((), 3, 3), (0, 0), (1, 1), chess.KNIGHT))
+        self.assertEqual(3, find_min_moves(Board((), 3, 3), (0, 0), (0, 1), chess.KNIGHT))
+        self.assertEqual([3, None], find_min_moves_batch(Board((), 3, 3), [((0, 0), (0, 1)), ((0, 0), (1, 1))],
+                                                         chess.KNIGHT))
+
+        # boards with other occupied spots are still searched
+        self.assertEqual(3, find_min_moves(Board({(0, 1)}, 3, 3), (0, 0), (0, 2), chess.ROOK))
+        self.assertIsNone(find_min_moves(Board({(0, 1), (1, 0)}, 3, 3), (0, 0), (0, 2), chess.ROOK))
+
+        # missing files hold no tables, and other files aren't mapped
+        self.assertEqual([], chess.load_distance_tables(os.path.join(directory.name, 'missing.bin')))
+        with open(path, 'wb') as tables_file:
+            tables_file.write(b'not tables')
+        with self.assertRaises(ValueError):
+            chess.load_distance_tables(path)
+
+    def test_find_min_moves_all_pieces(self):
+        board = Board({(2, 2), (2, 3), (3, 3), (3, 2), (3, 4), (4, 4)})
+
+        # same answers as one query per piece, for Boards and 2D lists alike
+        for start_loc, end_loc in [((4, 1), (2, 5)), ((0, 0), (7, 7)), ((0, 0), (7, 6)), ((5, 5), (5, 5))]:
+            expected = {piece: find_min_moves(board, start_loc, end_loc, piece) for piece in chess.SUPPORTED_PIECES}
+            self.assertEqual(expected, chess.find_min_moves_all_pieces(board, start_loc, end_loc))
+            self.assertEqual(expected, chess.find_min_moves_all_pieces(board.to_grid(), start_loc, end_loc))
+        self.assertEqual({chess.BISHOP: None, chess.KING: 7, chess.KNIGHT: 5, chess.ROOK: 2},
+                         chess.find_min_moves_all_pieces(Board(), (0, 0), (7, 6)))
+
+        # invalid queries have no path for any piece
+        self.assertEqual({piece: None for piece in chess.SUPPORTED_PIECES},
+                         chess.find_min_moves_all_pieces(board, (0, 0), (2, 2)))
+        self.assertEqual({piece: None for piece in chess.SUPPORTED_PIECES},
+                         chess.find_min_moves_all_pieces(board, (0, 0), (8, 0)))
+
+    def test_register_piece(self):
+        # pieces not yet registered are rejected by every query
+        board = Board({(2, 2)})
+        self.assertIsNone(find_min_moves(board, (0, 0), (7, 7), 'queen'))
+        self.assertIsNone(find_min_moves(board, (0, 0), (0, 0), 'queen'))
+        self.assertIsNone(find_shortest_path(board, (0, 0), (7, 7), 'queen'))
+        self.assertEqual([None, None], find_min_moves_batch(board, [((0, 0), (7, 7)), ((0, 0), (0, 0))], 'queen'))
+        self.assertEqual([None], find_shortest_paths_batch(board, [((0, 0), (7, 7))], 'queen'))
+        self.assertIsNone(chess.find_min_moves_multi(board, [(0, 0)], [(7, 7)], 'queen'))
+
+        for name in ('queen', 'camel', 'nightrider', 'short_rook', 'amazon'):
+            chess.register_piece(name, chess.FAIRY_PIECES[name])
+            self.addCleanup(chess.unregister_piece, name)
+        board = Board({(2, 2), (2, 3), (3, 3), (3, 2), (3, 4), (4, 4)})
+
+        self.assertEqual({(1, 3), (3, 1)}, generate_possible_moves(Board(), (0, 0), 'Camel'))
+        self.assertEqual({(0, 1), (0, 2), (0, 3), (0, 4), (1, 0), (2, 0), (3, 0), (4, 0)},
+                         generate_possible_moves(Board(), (0, 0), 'short_rook'))
+        self.assertEqual(2, find_min_moves(Board(), (0, 0), (7, 6), 'queen'))
+        self.assertEqual(2, find_min_moves(Board(), (0, 0), (0, 7), 'short_rook'))
+
+        # riders of other offsets than the rook and bishop are blocked along their rays too
+        self.assertEqual(1, find_min_moves(Board(), (0, 0), (6, 3), 'nightrider'))
+        self.assertEqual([(0, 0), (1, 2), (7, 5), (6, 3)], find_shortest_path(Board({(4, 2)}), (0, 0), (6, 3), 'nightrider'))
+
+        # the camel never leaves the squares of its color
+        self.assertIsNone(find_min_moves(Board(), (0, 0), (0, 1), 'camel'))
+        self.assertEqual([0, 1, 0], chess.connected_components(Board(), 'camel')[0][:3])
+
+        # every search, the distance field and its updates agree on registered pieces
+        for piece in ('queen', 'camel', 'nightrider', 'short_rook', 'amazon'):
+            field = chess.DistanceField(board, (0, 0), piece)
+            self.assertEqual(distance_field(board, (0, 0), piece)[0], field.distances())
+            for end_loc in [(7, 7), (2, 5), (5, 0), (1, 1)]:
+                expected = field.distance(end_loc)
+                for search in (chess.BFS, chess.BIDIRECTIONAL, chess.ASTAR, None):
+                    self.assertEqual(expected, find_min_moves(board, (0, 0), end_loc, piece, search))
+            field.free((3, 3))
+            field.occupy((1, 1))
+            changed = Board({(2, 2), (2, 3), (1, 1), (3, 2), (3, 4), (4, 4)})
+            self.assertEqual(distance_field(changed, (0, 0), piece)[0], field.distances())
+
+        # invalid specs and names
+        self.assertRaises(ValueError, chess.register_piece, 'Queen', chess.FAIRY_PIECES['queen'])
+        self.assertRaises(ValueError, chess.register_piece, 'nothing', chess.PieceSpec())
+        self.assertRaises(ValueError, chess.register_piece, 'null', chess.PieceSpec(leaps=((0, 0),)))
+        self.assertRaises(ValueError, chess.register_piece, 'stuck', chess.PieceSpec(rides=((1, 0),), max_range=0))
+        self.assertRaises(ValueError, chess.unregister_piece, chess.KING)
+        self.assertNotIn('nothing', chess.SUPPORTED_PIECES)
+
+    def test_find_min_moves_multi(self):
+        board = Board({(2, 2), (2, 3), (3, 3), (3, 2), (3, 4), (4, 4)})
+        start_locs = [(0, 0), (7, 7)]
+        end_locs = [(2, 5), (5, 5)]
+
+        # the nearest pair of locations, found by a single search from every start location
+        self.assertEqual((2, (7, 7), (5, 5), [(7, 7), (6, 6), (5, 5)]),
+                         chess.find_min_moves_multi(board, start_locs, end_locs, chess.KING))
+        for piece in chess.SUPPORTED_PIECES:
+            min_moves, start_loc, end_loc, path = chess.find_min_moves_multi(board.to_grid(), start_locs, end_locs, piece)
+            pair_min_moves = [find_min_moves(board, start_loc, end_loc, piece)
+                              for start_loc in start_locs for end_loc in end_locs]
+            self.assertEqual(min(moves for moves in pair_min_moves if moves is not None), min_moves)
+            self.assertEqual(min_moves, find_min_moves(board, start_loc, end_loc, piece))
+            self.assertEqual((start_loc, end_loc, min_moves + 1), (path[0], path[-1], len(path)))
+        stats = chess.SearchStats()
+        chess.find_min_moves_multi(board, start_locs, end_locs, chess.ROOK, stats)
+        self.assertEqual(chess.BFS, stats.search)
+        self.assertGreater(stats.nodes_expanded, 0)
+
+        # an end location among the start locations, and locations without any path
+        self.assertEqual((0, (7, 7), (7, 7), [(7, 7)]),
+                         chess.find_min_moves_multi(board, start_locs, [(2, 5), (7, 7)], chess.KNIGHT))
+        self.assertIsNone(chess.find_min_moves_multi(board, [(0, 0)], [(0, 1), (3, 3), (8, 8)], chess.BISHOP))
+        self.assertIsNone(chess.find_min_moves_multi(board, [], end_locs, chess.KING))
+        self.assertIsNone(chess.find_min_moves_multi(board, start_locs, [], chess.KING))
+
+    def test_board_strings(self):
+        board = Board({(2, 2), (2, 3), (0, 7), (7, 0)})
+        self.assertEqual('7X/8/2XX4/8/8/8/8/X7', board.to_fen())
+        self.assertEqual(board, Board.from_fen('7X/8/2XX4/8/8/8/8/X7'))
+        self.assertEqual(board, Board.from_fen(' 7x/8/2xX4/8/8/8/8/X7\n'))
+        self.assertEqual(Board(), Board.from_fen('8/8/8/8/8/8/8/8'))
+
+        # runs of empty spots longer than 9, and any dimensions
+        board = Board({(1, 2), (2, 11)}, 3, 12)
+        self.assertEqual('12/2X9/11X', board.to_fen())
+        self.assertEqual(board, Board.from_fen(board.to_fen()))
+
+        # empty board strings, rows of different lengths and invalid characters
+        self.assertRaises(ValueError, Board.from_fen, '')
+        self.assertRaises(ValueError, Board.from_fen, ' \n')
+        self.assertRaises(ValueError, Board.from_fen, '/')
+        self.assertRaises(ValueError, Board.from_fen, '8/7')
+        self.assertRaises(ValueError, Board.from_fen, '8/7Q')
+
+        # packed bits, a byte per 8 squares
+        for board in [Board({(2, 2), (2, 3), (0, 7), (7, 0)}), Board({(1, 2), (2, 11)}, 3, 12), Board()]:
+            self.assertEqual((len(board.cells) + 7) // 8, len(board.to_bytes()))
+            self.assertEqual(board, Board.from_bytes(board.to_bytes(), board.num_rows, board.num_cols))
+        self.assertEqual(b'\x80\x00\x0c\x00\x00\x00\x00\x01', Board({(2, 2), (2, 3), (0, 7), (7, 0)}).to_bytes())
+
+    def test_boards_file(self):
+        boards = [Board(), Board({(2, 2), (2, 3), (0, 7), (7, 0)}), Board(set((row, row) for row in range(8)))]
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'boards.bin')
+
+        self.assertEqual(3, chess.write_boards(path, (board.to_grid() for board in boards)))
+        self.assertEqual(boards, chess.load_boards(path))
+        with open(path, 'rb') as boards_file:
+            self.assertEqual(boards, list(chess.iter_boards(boards_file)))
+        packed = chess.load_boards(path, packed=True)
+        self.assertEqual((8, 8, 8), packed[:3])
+        self.assertEqual(boards, [Board.from_bytes(packed.data[index * 8:(index + 1) * 8]) for index in range(3)])
+
+        # text files of board strings load the same way
+        text_path = os.path.join(directory.name, 'boards.txt')
+        with open(text_path, 'w') as text_file:
+            text_file.write('\n'.join(board.to_fen() for board in boards) + '\n\n')
+        self.assertEqual(boards, chess.load_boards(text_path))
+        self.assertEqual(packed, chess.load_boards(text_path, packed=True))
+
+        # lines shorter than the magic bytes of a boards file
+        with open(text_path, 'w') as text_file:
+            text_file.write('3\nX2\n1X1\n')
+        self.assertEqual([Board((), 1, 3), Board({(0, 0)}, 1, 3), Board({(0, 1)}, 1, 3)], chess.load_boards(text_path))
+
+        # boards of different dimensions and truncated files
+        self.assertRaises(ValueError, chess.write_boards, path, [Board(), Board(num_rows=9)])
+        chess.write_boards(path, boards)
+        with open(path, 'r+b') as boards_file:
+            boards_file.truncate(chess.BOARDS_HEADER.size + 12)
+        self.assertRaises(ValueError, chess.load_boards, path)
@@ -0,0 +1,29 @@
+from unittest import TestCase
+
+import chess
+import runner
+from chess import Board
+from chess import generate_board
+
+
+class TestRunner(TestCase):
+
+    def test_run_queries(self):
+        boards = [Board(), generate_board({(2, 2), (2, 3), (3, 3), (3, 2), (3, 4), (4, 4)}),
+                  Board({(4, 4), (5, 5), (5, 3), (6, 4)}), Board({(2, 3), (3, 4)}, 5, 9)]
+        locations = [(0, 0), (4, 1), (2, 5), (5, 4), (7, 7), (3, 3)]
+        queries = [(index, start_loc, end_loc, piece)
+                   for index in range(len(boards)) for piece in sorted(chess.SUPPORTED_PIECES)
+                   for start_loc in locations for end_loc in locations]
+
+        # results come back in the order of the queries, matching the queries answered on their own
+        expected = [chess.find_min_moves(boards[index], start_loc, end_loc, piece)
+                    for index, start_loc, end_loc, piece in queries]
+        self.assertEqual(expected, runner.run_queries(boards, queries, workers=2, chunk_size=7))
+
+        expected = [chess.find_shortest_path(boards[index], start_loc, end_loc, piece)
+                    for index, start_loc, end_loc, piece in queries]
+        self.assertEqual(expected, runner.run_queries(boards, queries, workers=2, paths=True))
+
+        # no queries
+        self.assertEqual([], runner.run_queries(boards, []))
@@ -0,0 +1,72 @@
+import asyncio
+import json
+from unittest import TestCase
+
+import chess
+import service
+
+
+class TestService(TestCase):
+
+    def test_coalesced_queries(self):
+        board = chess.Board({(2, 2), (2, 3), (3, 3), (3, 2), (3, 4), (4, 4)})
+        ends = [(2, 5), (7, 7), (0, 0), (3, 3), (2, 5)]
+
+        async def answer_all():
+            query_service = service.QueryService()
+            queries = [{'board': hex(board.occupied), 'start': [4, 1], 'end': list(end_loc), 'piece': 'Knight'}
+                       for end_loc in ends]
+            queries.append(dict(queries[0], paths=True))
+            results = await asyncio.gather(*(query_service.answer(query) for query in queries))
+            return query_service, results
+
+        query_service, results = asyncio.run(answer_all())
+
+        # queries on the same board, start location and piece share a search
+        self.assertEqual([chess.find_min_moves(board, (4, 1), end_loc, chess.KNIGHT) for end_loc in ends], results[:-1])
+        self.assertEqual(chess.find_shortest_path(board, (4, 1), (2, 5), chess.KNIGHT), results[-1])
+        self.assertEqual(6, query_service.queries)
+        self.assertEqual(2, query_service.searches)
+
+    def test_server_and_load(self):
+        queries = service.generate_queries(16, 16, 0.3, chess.KING, 40, seed=3)
+
+        async def serve_load():
+            query_service = service.QueryService()
+            server = await service.start_server(query_service, port=0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                load = await service.run_load(queries, port=port, concurrency=4)
+
+                # invalid queries get an error line carrying their id
+                reader, writer = await asyncio.open_connection(service.DEFAULT_HOST, port)
+                writer.write(b'{"id": 7, "board": "0x0", "start": [0, 0], "end": [1, 1], "piece": "queen"}\n')
+                writer.write(b'not json\n')
+                # as do malformed locations, rather than leaving the client waiting
+                writer.write(b'{"id": 8, "board": [], "start": [1], "end": [2, 2], "piece": "king"}\n')
+                errors = [json.loads(await asyncio.wait_for(reader.readline(), 5)) for line in range(3)]
+                writer.close()
+                await writer.wait_closed()
+                # let the server read the end of the connections
+                await asyncio.sleep(0.01)
+            return query_service, load, errors
+
+        query_service, (results, latencies), errors = asyncio.run(serve_load())
+
+        board = chess.Board.from_bitboard(int(queries[0]['board'], 16), 16, 16)
+        expected = [chess.find_min_moves(board, query['start'], query['end'], chess.KING) for query in queries]
+        self.assertEqual(expected, [result['min_moves'] for result in results])
+        self.assertEqual(list(range(len(queries))), [result['id'] for result in results])
+        self.assertEqual(40, query_service.queries)
+        self.assertLessEqual(query_service.searches, 40)
+        self.assertEqual(7, errors[0]['id'])
+        self.assertIn('queen', errors[0]['error'])
+        self.assertIn('error', errors[1])
+        self.assertEqual(8, errors[2]['id'])
+        self.assertIn('location', errors[2]['error'])
+
+        summary = service.latency_percentiles(latencies)
+        self.assertEqual([50, 90, 99, 'max'], list(summary))
+        self.assertLessEqual(summary[50], summary[99])
+        self.assertEqual(max(latencies), summary['max'])
+        self.assertEqual({50: 5, 90: 9, 99: 10, 'max': 10}, service.latency_percentiles(range(1, 11)))
@@ -0,0 +1,80 @@
+import io
+import json
+from unittest import TestCase
+from unittest.mock import patch
+
+import chess
+import streaming
+
+
+class TestStreaming(TestCase):
+
+    def test_parse_board(self):
+        occupied_spots = {(2, 2), (2, 3), (3, 3), (3, 2)}
+        board = chess.Board(occupied_spots)
+        self.assertEqual(board, streaming.parse_board([list(spot) for spot in occupied_spots]))
+        self.assertEqual(board, streaming.parse_board(hex(board.occupied)))
+        self.assertEqual(board, streaming.parse_board(hex(board.occupied)[2:]))
+        self.assertEqual(chess.Board(), streaming.parse_board(''))
+
+        board = chess.Board({(9, 11), (0, 3)}, 10, 12)
+        self.assertEqual(board, streaming.parse_board([[9, 11], [0, 3]], 10, 12))
+        self.assertEqual(board, streaming.parse_board(hex(board.occupied), 10, 12))
+        self.assertEqual(board, streaming.parse_board('3X8/' + '12/' * 8 + '11X'))
+
+        # boards too large or without squares are rejected before they're allocated
+        self.assertRaises(ValueError, streaming.parse_board, '99999999999999999999/1')
+        self.assertRaises(ValueError, streaming.parse_board, [], 100000000000, 100000000000)
+        self.assertRaises(ValueError, streaming.parse_board, '0x0', 0, 8)
+
+    def test_answer_lines(self):
+        spots = [[2, 2], [2, 3], [3, 3], [3, 2], [3, 4], [4, 4]]
+        lines = [json.dumps({'id': 1, 'board': [], 'start': [3, 3], 'end': [5, 1], 'piece': 'king'}),
+                 json.dumps({'board': spots, 'start': [4, 1], 'end': [2, 5], 'piece': 'knight'}),
+                 json.dumps({'board': spots, 'start': [4, 1], 'end': [2, 5], 'piece': 'Rook'}),
+                 '',
+                 json.dumps({'board': spots, 'start': [4, 1], 'end': [3, 3], 'piece': 'rook'}),
+                 json.dumps({'board': spots, 'start': [4, 1], 'end': [2, 5], 'piece': 'queen'}),
+                 '{"board": ',
+                 json.dumps({'id': 2, 'board': [], 'start': [1], 'end': [2, 2], 'piece': 'king'})]
+
+        # consecutive queries on the same board parse it once, invalid queries don't stop the stream
+        with patch('streaming.parse_board', wraps=streaming.parse_board) as parse_board:
+            results = [json.loads(line) for line in streaming.answer_lines(iter(lines))]
+        self.assertEqual(2, parse_board.call_count)
+        self.assertEqual([{'id': 1, 'min_moves': 2}, {'min_moves': 4}, {'min_moves': 3}, {'min_moves': None}],
+                         results[:4])
+        self.assertIn('error', results[4])
+        self.assertIn('error', results[5])
+        self.assertEqual(2, results[6]['id'])
+        self.assertIn('error', results[6])
+        self.assertEqual(7, len(results))
+
+        # csv queries with compact boards, results written as they're answered
+        board = chess.Board(tuple(spot) for spot in spots)
+        in_file = io.StringIO(',3,3,5,1,king\n{:x},4,1,2,5,rook\n{:x},4,1,3,3,rook\n1,2\n0x0,0,0,2,2,king,8\n'.format(
+            board.occupied, board.occupied))
+        out_file = io.StringIO()
+        streaming.stream_queries(in_file, out_file, streaming.CSV, paths=True)
+        out_lines = out_file.getvalue().splitlines()
+        self.assertEqual(json.dumps(chess.find_shortest_path(board, (4, 1), (2, 5), chess.ROOK)), out_lines[1])
+        self.assertEqual(['[[3, 3], [4, 2], [5, 1]]', ''], [out_lines[0], out_lines[2]])
+        self.assertTrue(out_lines[3].startswith('error'))
+        self.assertTrue(out_lines[4].startswith('error'))
+
+        # oversized boards get an error, and the next query is still answered
+        lines = [json.dumps({'id': 1, 'board': '99999999999999999999/1', 'start': [0, 0], 'end': [1, 1], 'piece': 'king'}),
+                 json.dumps({'id': 2, 'board': [], 'rows': 100000000000, 'cols': 100000000000,
+                             'start': [0, 0], 'end': [1, 1], 'piece': 'king'}),
+                 json.dumps({'id': 3, 'board': [], 'start': [0, 0], 'end': [1, 1], 'piece': 'king'})]
+        results = [json.loads(line) for line in streaming.answer_lines(lines)]
+        self.assertEqual([1, 2], [result['id'] for result in results[:2]])
+        self.assertIn('error', results[0])
+        self.assertIn('error', results[1])
+        self.assertEqual({'id': 3, 'min_moves': 1}, results[2])
+        results = list(streaming.answer_lines(['0x0,0,0,1,1,king,99999999999999999999,2', '0x0,0,0,1,1,king'], streaming.CSV))
+        self.assertTrue(results[0].startswith('error'))
+        self.assertEqual('1', results[1])
+
+        with self.assertRaises(ValueError):
+            list(streaming.answer_lines([], 'xml'))